@@ -0,0 +1,23 @@
+from django.urls import path
+
+from .async_views import (
+    autocomplete_events,
+    event_detail,
+    galaxy_by_supernova_count,
+    galaxy_by_supernova_diversity,
+    subtype_with_conflicting_sn,
+    supernova_uncertainty,
+)
+
+app_name = "events_async"
+
+urlpatterns = [
+    path("<int:pk>/", event_detail, name="detail"),
+    path("autocomplete", autocomplete_events, name="autocomplete"),
+    path(
+        "galaxy-sn-diversity", galaxy_by_supernova_diversity, name="supernova_diversity"
+    ),
+    path("galaxy-sn-count", galaxy_by_supernova_count, name="supernova_count"),
+    path("supernova-uncertainty", supernova_uncertainty, name="supernova_uncertainty"),
+    path("subtype-uncertainty", subtype_with_conflicting_sn, name="subtype_uncertainty"),
+]
@@ -0,0 +1,104 @@
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from . import documents, models, statistics
+from .views import (
+    StatisticsPagination,
+    autocomplete_limit,
+    galaxy_count_pagination,
+    galaxy_count_row,
+    galaxy_diversity_pagination,
+    galaxy_diversity_row,
+    positive_int_param,
+    subtype_conflict_pagination,
+    uncertainty_pagination,
+)
+
+# Native async versions of the read-only API, mounted under /api/async/events/.
+# Under ASGI they await the async ORM and cache instead of holding a worker
+# thread per request. Responses match their DRF counterparts in events.views.
+
+
+def async_api_view(view):
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            # DRF's request wrapper gives the shared helpers query_params
+            return await view(Request(request), *args, **kwargs)
+        except ValidationError as e:
+            return JsonResponse(e.detail, status=400, safe=False)
+
+    return wrapper
+
+
+@async_api_view
+async def event_detail(request, pk):
+    try:
+        document = await documents.aget_document(event_id=pk)
+    except models.Event.DoesNotExist:
+        return JsonResponse({"detail": "No Event matches the given query."}, status=404)
+    return JsonResponse(document)
+
+
+@async_api_view
+async def autocomplete_events(request):
+    prefix = request.query_params.get("q", "").strip()
+    limit = autocomplete_limit(request)
+
+    if not prefix:
+        return JsonResponse([], safe=False)
+
+    names = models.Event.objects.with_name_prefix(prefix).values_list("name", flat=True)
+    return JsonResponse(await statistics.alist(names[:limit]), safe=False)
+
+
+async def paginate(request, ranking, pagination, build=None):
+    page = await pagination.apaginate_queryset(ranking, request)
+    if build is not None:
+        page = await build(page)
+    return JsonResponse({"next": pagination.get_next_link(), "results": page})
+
+
+@async_api_view
+async def galaxy_by_supernova_count(request):
+    top_n = positive_int_param(request, "top_n")
+    min_count = positive_int_param(request, "min_count")
+
+    async def build(rows):
+        events = await statistics.agalaxy_event_names([g["galaxy_id"] for g in rows])
+        return [galaxy_count_row(g, events) for g in rows]
+
+    ranking = statistics.galaxy_supernova_counts(min_count=min_count)
+    if top_n:
+        rows = await ranking.aslice(0, min(top_n, StatisticsPagination.max_limit))
+        return JsonResponse({"next": None, "results": await build(rows)})
+
+    return await paginate(request, ranking, galaxy_count_pagination(), build)
+
+
+@async_api_view
+async def galaxy_by_supernova_diversity(request):
+    async def build(rows):
+        types = await statistics.agalaxy_subtype_names([g["galaxy_id"] for g in rows])
+        return [galaxy_diversity_row(g, types) for g in rows]
+
+    ranking = statistics.galaxy_supernova_diversity()
+    return await paginate(request, ranking, galaxy_diversity_pagination(), build)
+
+
+@async_api_view
+async def supernova_uncertainty(request):
+    ranking = statistics.supernova_uncertainty()
+    return await paginate(request, ranking, uncertainty_pagination())
+
+
+@async_api_view
+async def subtype_with_conflicting_sn(request):
+    ranking = statistics.subtype_conflicts()
+    return await paginate(request, ranking, subtype_conflict_pagination())
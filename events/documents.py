@@ -0,0 +1,132 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from . import models, serializers, statistics
+
+
+def build_documents(events):
+    """
+    Serialize events (expected to come from `with_osc_relations()`) into
+    unsaved EventDocument rows.
+    """
+    return [
+        models.EventDocument(
+            event=event,
+            document=serializers.EventOSCSchemaSerializer(event).data,
+        )
+        for event in events
+    ]
+
+
+def store_documents(events, generation=None):
+    """
+    Build and persist the documents of events, returning them by event id. With
+    the catalog generation read before the events were, the stored documents are
+    dropped again when a write landed in between: its invalidation may have run
+    before they were stored.
+    """
+    documents = build_documents(events)
+    models.EventDocument.objects.bulk_create(documents, ignore_conflicts=True)
+    if generation is not None and statistics.generation() != generation:
+        invalidate_events([d.event_id for d in documents])
+    return {d.event_id: d.document for d in documents}  # type: ignore
+
+
+def get_document(event_id=None, name=None):
+    """
+    Return the OSC document of one event, looked up by id or name, building and
+    storing it on a miss. Raises Event.DoesNotExist for unknown events.
+    """
+    lookup = {"event_id": event_id} if name is None else {"event__name": name}
+    document = (
+        models.EventDocument.objects.filter(**lookup)
+        .values_list("document", flat=True)
+        .first()
+    )
+    if document is not None:
+        return document
+
+    generation = statistics.generation()
+    lookup = {"pk": event_id} if name is None else {"name": name}
+    event = models.Event.objects.with_osc_relations().get(**lookup)
+    return store_documents([event], generation)[event.pk]
+
+
+async def aget_document(event_id=None, name=None):
+    """Async get_document(); stored documents are read with the async ORM"""
+    lookup = {"event_id": event_id} if name is None else {"event__name": name}
+    document = await (
+        models.EventDocument.objects.filter(**lookup)
+        .values_list("document", flat=True)
+        .afirst()
+    )
+    if document is not None:
+        return document
+    # a miss builds through the prefetching serializer and writes
+    return await sync_to_async(get_document)(event_id=event_id, name=name)
+
+
+def get_documents(event_ids):
+    """
+    Return the OSC documents of many events keyed by event id. Stored documents
+    are read in one query and the missing ones are built together, with one set
+    of prefetches for the whole batch.
+    """
+    documents = dict(
+        models.EventDocument.objects.filter(event_id__in=event_ids).values_list(
+            "event_id", "document"
+        )
+    )
+    missing = [event_id for event_id in event_ids if event_id not in documents]
+    if missing:
+        generation = statistics.generation()
+        events = models.Event.objects.with_osc_relations().filter(pk__in=missing)
+        documents.update(store_documents(events, generation))
+    return documents
+
+
+def rebuild_all_documents(chunk_size=500):
+    """Regenerate every stored document, e.g. after a bulk import"""
+    models.EventDocument.objects.all().delete()
+
+    chunk = []
+    count = 0
+    events = models.Event.objects.with_osc_relations().iterator(chunk_size=chunk_size)
+    for event in events:
+        chunk.append(event)
+        if len(chunk) == chunk_size:
+            count += len(store_documents(chunk))
+            chunk = []
+    if chunk:
+        count += len(store_documents(chunk))
+    return count
+
+
+def invalidate_events(event_ids):
+    models.EventDocument.objects.filter(event_id__in=event_ids).delete()
+
+
+def invalidate_source(source_id):
+    _invalidate_claiming_events(
+        models.HostGalaxy.objects.filter(source_id=source_id),
+        models.ClaimedType.objects.filter(source_id=source_id),
+        models.Attribute.objects.filter(source_id=source_id),
+    )
+
+
+def invalidate_galaxy(galaxy_id):
+    _invalidate_claiming_events(models.HostGalaxy.objects.filter(galaxy_id=galaxy_id))
+
+
+def invalidate_subtype(sub_type_id):
+    _invalidate_claiming_events(
+        models.ClaimedType.objects.filter(sub_type_id=sub_type_id)
+    )
+
+
+def _invalidate_claiming_events(*claims):
+    # single DELETE with one subquery per claim table
+    condition = Q()
+    for queryset in claims:
+        condition |= Q(event_id__in=queryset.values("event_id"))
+    models.EventDocument.objects.filter(condition).delete()
@@ -1,6 +1,7 @@
 import factory
 from factory.django import DjangoModelFactory
 from .models import Event, ClaimedType, HostGalaxy, Attribute, AttributeName
+from .units import CANONICAL_UNITS
 from sources.factories import SourceFactory
 from subtypes.factories import SubTypeFactory
 from galaxies.factories import GalaxyFactory
@@ -39,4 +40,4 @@ class AttributeFactory(DjangoModelFactory):
     name = factory.Iterator([choice[0] for choice in AttributeName.choices])  # type: ignore
     source = factory.SubFactory(SourceFactory)  # type: ignore
     value = factory.Faker("pyfloat", positive=True, max_value=1000)  # type: ignore
-    unit = factory.Iterator(["km/s", "Mpc", "", "mag"])  # type: ignore
+    unit = factory.LazyAttribute(lambda o: CANONICAL_UNITS[o.name])  # type: ignore
@@ -0,0 +1,103 @@
+"""
+Incremental parsing of a top-level JSON array or object.
+
+json.load builds the whole document before returning, so a catalog dump of
+several gigabytes needs several times that in memory. iter_json_items reads
+the file in chunks and decodes one element at a time with raw_decode, keeping
+only the unparsed tail of the current chunk and the element being decoded.
+"""
+
+import json
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\n\r"
+DELIMITERS = [*WHITESPACE, ",", ":", "]", "}"]
+
+
+class _Reader:
+    """Sliding window over a text stream, with everything before pos discarded on refill"""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """Read another chunk, returns False at the end of the stream"""
+        chunk = self.fp.read(size or self.chunk_size)
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character without consuming it, "" at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, characters):
+        character = self.peek()
+        if not character or character not in characters:
+            raise self.error(f"Expecting one of {characters!r}")
+        self.pos += 1
+        return character
+
+    def decode(self, decoder):
+        """
+        Decode the value at pos. A value is only complete once a delimiter follows
+        it, "[1e" decodes as 1 with the exponent still unread, so anything else is
+        retried with more input. Every retry doubles the read so large values take a
+        linear number of passes.
+        """
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                if self.buffer[end : end + 1] in DELIMITERS or self.eof:
+                    self.pos = end
+                    return value
+            self.fill(size)
+            size *= 2
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+
+def iter_json_items(fp, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of the top-level JSON array in the text stream fp, or the
+    (key, value) pairs of a top-level object, one at a time.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(fp, chunk_size)
+    opening = reader.expect("[{")
+    closing = "]" if opening == "[" else "}"
+
+    if reader.peek() == closing:
+        reader.pos += 1
+    else:
+        while True:
+            if opening == "[":
+                yield reader.decode(decoder)
+            else:
+                if reader.peek() != '"':
+                    raise reader.error("Expecting property name enclosed in double quotes")
+                key = reader.decode(decoder)
+                reader.expect(":")
+                yield key, reader.decode(decoder)
+            if reader.expect("," + closing) == closing:
+                break
+
+    if reader.peek():
+        raise reader.error("Extra data")
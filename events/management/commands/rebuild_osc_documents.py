@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from events.documents import rebuild_all_documents
+
+
+class Command(BaseCommand):
+    help = "Regenerate the stored OSC document of every event, e.g. after a bulk import"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, chunk_size, **options):
+        count = rebuild_all_documents(chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} OSC documents"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.summaries import find_mismatches, rebuild_all_statistics
+
+
+class Command(BaseCommand):
+    help = "Compare the statistics summary tables against a full recompute"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rebuild the summary tables when they disagree",
+        )
+
+    def handle(self, *args, repair, **options):
+        mismatches = find_mismatches()
+        for table, key, stored, expected in mismatches:
+            self.stdout.write(f"{table} {key}: stored {stored}, expected {expected}")
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Statistics tables are consistent"))
+        elif repair:
+            rebuild_all_statistics()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt statistics tables ({len(mismatches)} rows differed)")
+            )
+        else:
+            raise CommandError(f"{len(mismatches)} statistics rows differ from a full recompute")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from events.snapshot import write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write the memory-mapped columnar snapshot of the attribute and claim tables"
+
+    def handle(self, *args, **options):
+        snapshot = write_snapshot()
+        counts = ", ".join(f"{count} {table} rows" for table, count in snapshot.manifest["counts"].items())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {snapshot.path} ({counts})"))
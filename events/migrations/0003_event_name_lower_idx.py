@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:20
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_eventdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='events_event_name_lower_idx'),
+        ),
+    ]
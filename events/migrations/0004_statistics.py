@@ -0,0 +1,40 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_name_lower_idx'),
+        ('galaxies', '0003_alter_galaxy_name'),
+        ('subtypes', '0002_alter_subtype_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventStatistics',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='events.event')),
+                ('distinct_subtypes', models.PositiveIntegerField(default=0)),
+                ('distinct_hosts', models.PositiveIntegerField(default=0)),
+                ('total_sources', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GalaxyStatistics',
+            fields=[
+                ('galaxy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='galaxies.galaxy')),
+                ('event_count', models.PositiveIntegerField(db_index=True, default=0)),
+                ('subtype_count', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubTypeStatistics',
+            fields=[
+                ('sub_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='subtypes.subtype')),
+                ('conflicted_event_count', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:26
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_claims(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    ClaimedType = apps.get_model("events", "ClaimedType")
+    HostGalaxy = apps.get_model("events", "HostGalaxy")
+
+    def distinct_count(model, field):
+        counts = (
+            model.objects.filter(event=OuterRef("pk"))
+            .order_by()
+            .values("event")
+            .annotate(count=Count(field, distinct=True))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    Event.objects.update(
+        distinct_subtypes=distinct_count(ClaimedType, "sub_type"),
+        distinct_hosts=distinct_count(HostGalaxy, "galaxy"),
+    )
+    Event.objects.update(total_sources=F("distinct_subtypes") + F("distinct_hosts"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='distinct_hosts',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='distinct_subtypes',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='total_sources',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(count_claims, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='EventStatistics',
+        ),
+    ]
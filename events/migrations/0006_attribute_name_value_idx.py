@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_claim_counters'),
+        ('sources', '0002_source_sources_sou_name_d7c3f4_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attribute',
+            index=models.Index(fields=['name', 'value', 'event'], name='events_attr_name_value_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from events.summaries import group_spreads
+
+
+def compute_spreads(apps, schema_editor):
+    Attribute = apps.get_model("events", "Attribute")
+    AttributeSpread = apps.get_model("events", "AttributeSpread")
+    rows = Attribute.objects.order_by("event_id", "name", "id").values_list(
+        "event_id", "name", "value"
+    )
+    AttributeSpread.objects.bulk_create(
+        [
+            AttributeSpread(
+                event_id=event_id,
+                name=name,
+                value_count=count,
+                min_value=low,
+                max_value=high,
+                relative_std=relative_std,
+            )
+            for event_id, name, count, low, high, relative_std in group_spreads(list(rows))
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_attribute_name_value_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttributeSpread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('lumdist', 'Luminosity distance'), ('velocity', 'Recessional velocity'), ('redshift', 'Redshift'), ('maxabsmag', 'Max absolute magnitude'), ('maxappmag', 'Max apparent magnitude')], max_length=32)),
+                ('value_count', models.PositiveIntegerField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('relative_std', models.FloatField(null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attribute_spreads', to='events.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['relative_std'], name='events_attr_relativ_318d6d_idx'), models.Index(fields=['name', 'relative_std'], name='events_attr_name_930741_idx')],
+                'unique_together': {('event', 'name')},
+            },
+        ),
+        migrations.RunPython(compute_spreads, migrations.RunPython.noop),
+    ]
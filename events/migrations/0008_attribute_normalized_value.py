@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+from events.units import normalize_or_none
+
+
+def normalize_values(apps, schema_editor):
+    Attribute = apps.get_model("events", "Attribute")
+    attributes = list(Attribute.objects.only("name", "value", "unit"))
+    unknown = 0
+    for attribute in attributes:
+        attribute.normalized_value = normalize_or_none(attribute.name, attribute.value, attribute.unit)
+        unknown += attribute.normalized_value is None
+    Attribute.objects.bulk_update(attributes, ["normalized_value"], batch_size=500)
+    if unknown:
+        # rows with a unit without a conversion are kept, left out of filters and statistics
+        print(f"\n  {unknown} attributes have a unit without a conversion, normalized_value left NULL")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_attributespread'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attribute',
+            name='normalized_value',
+            field=models.FloatField(null=True),
+        ),
+        migrations.RunPython(normalize_values, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='attribute',
+            name='events_attr_name_value_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attribute',
+            index=models.Index(fields=['name', 'normalized_value', 'event'], name='events_attr_name_norm_idx'),
+        ),
+    ]
@@ -1,10 +1,77 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Lower
+
+
+class EventQuerySet(models.QuerySet):
+    def with_osc_relations(self):
+        """
+        Prefetch everything the OSC serializer touches so that assembling the
+        document costs a fixed number of queries regardless of claim count.
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                "host_galaxies",
+                queryset=HostGalaxy.objects.select_related("galaxy", "source"),
+            ),
+            models.Prefetch(
+                "claimed_types",
+                queryset=ClaimedType.objects.select_related("sub_type", "source"),
+            ),
+            models.Prefetch(
+                "attributes",
+                queryset=Attribute.objects.select_related("source"),
+            ),
+        )
+
+    def with_name_prefix(self, prefix):
+        """
+        Case-insensitive prefix match, written as a range over LOWER(name) so it
+        is answered by the functional name index instead of a LIKE scan.
+        """
+        prefix = prefix.lower()
+        queryset = self.annotate(name_lower=Lower("name")).filter(name_lower__gte=prefix)
+        if prefix and ord(prefix[-1]) < 0x10FFFF:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            queryset = queryset.filter(name_lower__lt=upper)
+        return queryset.order_by("name_lower")
+
+    def with_name_iexact(self, name):
+        return self.annotate(name_lower=Lower("name")).filter(name_lower=name.lower())
+
+    def with_attribute_ranges(self, ranges):
+        """
+        Events with, for every attribute name in `ranges`, a value satisfying all
+        of its lookups, e.g. {"redshift": {"gte": 0.01, "lte": 0.05}}. Values are
+        compared in the canonical unit of the attribute. Each name becomes an IN
+        subquery answered by a range scan of the (name, normalized value) index.
+        """
+        queryset = self
+        for name, lookups in ranges.items():
+            matching = Attribute.objects.filter(
+                name=name,
+                **{f"normalized_value__{lookup}": value for lookup, value in lookups.items()},
+            )
+            queryset = queryset.filter(id__in=matching.values("event_id"))
+        return queryset
 
 
 # Event represent supernova event
 class Event(models.Model):
     name = models.CharField(max_length=125, unique=True)
 
+    # denormalized claim counters, kept exact by events.summaries
+    distinct_subtypes = models.PositiveIntegerField(default=0, db_index=True)
+    distinct_hosts = models.PositiveIntegerField(default=0, db_index=True)
+    total_sources = models.PositiveIntegerField(default=0, db_index=True)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(Lower("name"), name="events_event_name_lower_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -51,8 +118,99 @@ class Attribute(models.Model):
     source = models.ForeignKey("sources.Source", on_delete=models.PROTECT)
     value = models.FloatField()
     unit = models.CharField(max_length=32)
+    # value in the canonical unit of the attribute (see events.units), NULL for a
+    # unit without a conversion loaded by a bulk import
+    normalized_value = models.FloatField(null=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["event", "name"]),
+            # covers range filters: the event ids come straight from the index
+            models.Index(
+                fields=["name", "normalized_value", "event"],
+                name="events_attr_name_norm_idx",
+            ),
+        ]
+
+    def clean(self):
+        from . import units
+
+        if self.name:
+            try:
+                units.conversion_factor(self.name, self.unit)
+            except units.UnitError as e:
+                raise ValidationError({"unit": str(e)})
+
+    def normalize(self):
+        """Set normalized_value from value and unit, for writes that bypass save()"""
+        from . import units
+
+        self.normalized_value = units.normalize(self.name, self.value, self.unit)
+        return self
+
+    def save(self, *args, **kwargs):
+        self.normalize()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"value", "unit", "name"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "normalized_value"}
+        super().save(*args, **kwargs)
+
+
+# Materialized OSC document of an Event, dropped whenever the data it was
+# built from changes and rebuilt on the next read
+class EventDocument(models.Model):
+    event = models.OneToOneField(
+        Event, on_delete=models.CASCADE, primary_key=True, related_name="document"
+    )
+    document = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# Summary tables of the statistics views, maintained incrementally from the
+# claim tables (see events.summaries)
+class GalaxyStatistics(models.Model):
+    galaxy = models.OneToOneField(
+        "galaxies.Galaxy",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="statistics",
+    )
+    event_count = models.PositiveIntegerField(default=0, db_index=True)
+    subtype_count = models.PositiveIntegerField(default=0, db_index=True)
+
+
+class SubTypeStatistics(models.Model):
+    sub_type = models.OneToOneField(
+        "subtypes.SubType",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="statistics",
+    )
+    conflicted_event_count = models.PositiveIntegerField(default=0, db_index=True)
+
+
+# Single row counting catalog writes. Cached statistics are keyed by it, and it
+# lives in the database so a write in any process retires them in every process
+class CatalogGeneration(models.Model):
+    value = models.BigIntegerField()
+
+
+# Spread of an event attribute across the sources reporting it, kept for every
+# attribute with more than one value (see events.summaries)
+class AttributeSpread(models.Model):
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="attribute_spreads"
+    )
+    name = models.CharField(max_length=32, choices=AttributeName.choices)
+    value_count = models.PositiveIntegerField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    # standard deviation over the absolute mean, null when the mean is zero
+    relative_std = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ("event", "name")
+        indexes = [
+            models.Index(fields=["relative_std"]),
+            models.Index(fields=["name", "relative_std"]),
         ]
@@ -8,99 +8,58 @@ class EventSerializer(serializers.ModelSerializer):
         fields = ["id", "name"]
 
 
+class EventBatchSerializer(serializers.Serializer):
+    max_events = 500
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    names = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def validate(self, attrs):
+        count = len(attrs["ids"]) + len(attrs["names"])
+        if count == 0:
+            raise serializers.ValidationError("Provide at least one event id or name.")
+        if count > self.max_events:
+            raise serializers.ValidationError(
+                f"At most {self.max_events} events can be requested at once."
+            )
+        return attrs
+
+
 class EventOSCSchemaSerializer(serializers.ModelSerializer):
     def to_representation(self, instance: models.Event):
         # Denormalize the detail into original OSC data schema
-        sources = []
+        aliases = SourceAliases()
 
         host_galaxy = [{"name": g.galaxy.name, "source": g.source} for g in instance.host_galaxies.all()]  # type: ignore
 
         claimed_type = [{"name": c.sub_type.name, "source": c.source} for c in instance.claimed_types.all()]  # type: ignore
 
-        attributes = instance.attributes.all()  # type: ignore
-
-        return {
-            instance.name: {
-                "schema": "https://github.com/astrocatalogs/supernovae/blob/d3ef5fc/SCHEMA.md",
-                "name": instance.name,
-                "sources": sources,
-                "hostgalaxy": aliasAndMergeSources(host_galaxy, sources, "name"),
-                "claimedtype": aliasAndMergeSources(claimed_type, sources, "name"),
-                "lumdist": aliasAndMergeSources(
-                    [
-                        {
-                            "name": "lumdist",
-                            "source": attr.source,
-                            "value": attr.value,
-                            "unit": attr.unit,
-                        }
-                        for attr in attributes
-                        if attr.name == "lumdist"
-                    ],
-                    sources,
-                    "value",
-                ),
-                "velocity": aliasAndMergeSources(
-                    [
-                        {
-                            "name": "velocity",
-                            "source": attr.source,
-                            "value": attr.value,
-                            "unit": attr.unit,
-                        }
-                        for attr in attributes
-                        if attr.name == "velocity"
-                    ],
-                    sources,
-                    "value",
-                ),
-                "redshift": aliasAndMergeSources(
-                    [
-                        {
-                            "name": "redshift",
-                            "source": attr.source,
-                            "value": attr.value,
-                            "unit": attr.unit,
-                        }
-                        for attr in attributes
-                        if attr.name == "redshift"
-                    ],
-                    sources,
-                    "value",
-                ),
-                "maxabsmag": aliasAndMergeSources(
-                    [
-                        {
-                            "name": "maxabsmag",
-                            "source": attr.source,
-                            "value": attr.value,
-                            "unit": attr.unit,
-                        }
-                        for attr in attributes
-                        if attr.name == "maxabsmag"
-                    ],
-                    sources,
-                    "value",
-                ),
-                "maxappmag": aliasAndMergeSources(
-                    [
-                        {
-                            "name": "maxappmag",
-                            "source": attr.source,
-                            "value": attr.value,
-                            "unit": attr.unit,
-                        }
-                        for attr in attributes
-                        if attr.name == "maxappmag"
-                    ],
-                    sources,
-                    "value",
-                ),
-            }
+        # group attributes by name in a single pass
+        attributes = {name: [] for name in models.AttributeName.values}
+        for attr in instance.attributes.all():  # type: ignore
+            attributes[attr.name].append(
+                {
+                    "name": attr.name,
+                    "source": attr.source,
+                    "value": attr.value,
+                    "unit": attr.unit,
+                }
+            )
+
+        document = {
+            "schema": "https://github.com/astrocatalogs/supernovae/blob/d3ef5fc/SCHEMA.md",
+            "name": instance.name,
+            "sources": aliases.sources,
+            "hostgalaxy": aliasAndMergeSources(host_galaxy, aliases, "name"),
+            "claimedtype": aliasAndMergeSources(claimed_type, aliases, "name"),
         }
+        for name, entities in attributes.items():
+            document[name] = aliasAndMergeSources(entities, aliases, "value")
+
+        return {instance.name: document}
 
 
-def aliasAndMergeSources(entities, sources, dataKey):
+def aliasAndMergeSources(entities, aliases, dataKey):
     """
     denormalize to OSC schema, If entities has same data value identified by dataKey,
     they will be collapsed into single entity with source represented by comma separated
@@ -109,43 +68,51 @@ def aliasAndMergeSources(entities, sources, dataKey):
     # create groups
     grouped = {}
     for e in entities:
-        if e[dataKey] in grouped:
-            grouped[e[dataKey]].append(e)
-            continue
-        grouped[e[dataKey]] = [e]
+        grouped.setdefault(e[dataKey], []).append(e)
 
     # merge groups
     result = []
     for group in grouped.values():
         result.append(
             {
-                "source": ",".join([get_alias(e["source"], sources) for e in group]),
+                "source": ",".join([aliases.get_alias(e["source"]) for e in group]),
                 **{k: v for k, v in group[0].items() if k != "source"},
             }
         )
     return result
 
 
-def get_alias(source, sources) -> str:
+class SourceAliases:
     """
-    Format "sources.Source" to the OSC data schema and add it to the unique source array. Return alias for further use.
-    If the source is already in the array, it do nothing and return the alias
+    Unique source array of an OSC document, with an id to alias map so that
+    looking up an already aliased source is constant time.
     """
-    for s in sources:
-        if s["id"] == source.id:
-            return s["alias"]
-
-    alias = str(
-        len(sources) + 2
-    )  # 1 for array index connection + 1 for increment counter
-    sources.append(
-        {
-            "id": source.id,
-            "name": source.name,
-            "url": source.url,
-            "doi": source.doi,
-            "secondary": source.secondary,
-            "alias": alias,
-        }
-    )
-    return alias
+
+    def __init__(self):
+        self.sources = []
+        self._alias_by_id = {}
+
+    def get_alias(self, source) -> str:
+        """
+        Format "sources.Source" to the OSC data schema and add it to the unique source array. Return alias for further use.
+        If the source is already in the array, it do nothing and return the alias
+        """
+        alias = self._alias_by_id.get(source.id)
+        if alias is not None:
+            return alias
+
+        alias = str(
+            len(self.sources) + 2
+        )  # 1 for array index connection + 1 for increment counter
+        self.sources.append(
+            {
+                "id": source.id,
+                "name": source.name,
+                "url": source.url,
+                "doi": source.doi,
+                "secondary": source.secondary,
+                "alias": alias,
+            }
+        )
+        self._alias_by_id[source.id] = alias
+        return alias
@@ -0,0 +1,188 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from galaxies.models import Galaxy
+from sources.models import Source
+from subtypes.models import SubType
+
+from . import documents, models, snapshot, statistics, summaries
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """
+    Skip the incremental maintenance below for bulk writes. Callers are expected
+    to rebuild the derived tables themselves afterwards.
+    """
+    previous = getattr(_state, "suspended", False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, "suspended", False)
+
+
+def is_event_cascade(origin):
+    # rows removed together with their event are handled by the event receivers
+    return isinstance(origin, models.Event) or getattr(origin, "model", None) is models.Event
+
+
+def invalidate(function, *args):
+    function(*args)
+    # until this write commits, readers still see the previous state and can store
+    # documents or build a snapshot from it after the first call, so repeat it
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: function(*args))
+
+
+# ================= Stored OSC documents =================
+@receiver(post_save, sender=models.Event)
+def event_saved(sender, instance, created, **kwargs):
+    if not created and not is_suspended():
+        invalidate(documents.invalidate_events, [instance.pk])
+
+
+@receiver(pre_save, sender=models.ClaimedType)
+@receiver(pre_save, sender=models.HostGalaxy)
+@receiver(pre_save, sender=models.Attribute)
+def claim_moving(sender, instance, **kwargs):
+    if is_suspended() or not instance.pk:
+        return
+    # an update may move the claim to another event, whose document loses it
+    instance._document_events = set(
+        sender.objects.filter(pk=instance.pk).values_list("event_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=models.ClaimedType)
+@receiver(post_save, sender=models.HostGalaxy)
+@receiver(post_save, sender=models.Attribute)
+@receiver(post_delete, sender=models.ClaimedType)
+@receiver(post_delete, sender=models.HostGalaxy)
+@receiver(post_delete, sender=models.Attribute)
+def claim_changed(sender, instance, origin=None, **kwargs):
+    # documents are cascade deleted together with their event
+    if is_suspended() or is_event_cascade(origin):
+        return
+    event_ids = getattr(instance, "_document_events", set()) | {instance.event_id}
+    instance.__dict__.pop("_document_events", None)
+    invalidate(documents.invalidate_events, list(event_ids))
+
+
+@receiver(post_save, sender=Source)
+def source_saved(sender, instance, created, **kwargs):
+    if not created and not is_suspended():
+        invalidate(documents.invalidate_source, instance.pk)
+
+
+@receiver(post_save, sender=Galaxy)
+def galaxy_saved(sender, instance, created, **kwargs):
+    if not created and not is_suspended():
+        invalidate(documents.invalidate_galaxy, instance.pk)
+
+
+@receiver(post_save, sender=SubType)
+def subtype_saved(sender, instance, created, **kwargs):
+    if not created and not is_suspended():
+        invalidate(documents.invalidate_subtype, instance.pk)
+
+
+# ================= Statistics summary tables =================
+@receiver(pre_save, sender=models.ClaimedType)
+@receiver(pre_save, sender=models.HostGalaxy)
+@receiver(pre_delete, sender=models.ClaimedType)
+@receiver(pre_delete, sender=models.HostGalaxy)
+def claim_changing(sender, instance, origin=None, **kwargs):
+    if is_suspended() or is_event_cascade(origin):
+        return
+    event_ids = {instance.event_id}
+    if instance.pk:
+        # an update may move the claim to another event
+        event_ids.update(
+            sender.objects.filter(pk=instance.pk).values_list("event_id", flat=True)
+        )
+    instance._statistics_before = summaries.capture(event_ids)
+
+
+@receiver(post_save, sender=models.ClaimedType)
+@receiver(post_save, sender=models.HostGalaxy)
+@receiver(post_delete, sender=models.ClaimedType)
+@receiver(post_delete, sender=models.HostGalaxy)
+def claim_statistics_changed(sender, instance, **kwargs):
+    before = getattr(instance, "_statistics_before", None)
+    if before is not None:
+        del instance._statistics_before
+        summaries.refresh(before)
+
+
+@receiver(pre_delete, sender=models.Event)
+def event_deleting(sender, instance, **kwargs):
+    if not is_suspended():
+        instance._statistics_before = summaries.capture([instance.pk])
+
+
+@receiver(post_delete, sender=models.Event)
+def event_deleted(sender, instance, **kwargs):
+    before = getattr(instance, "_statistics_before", None)
+    if before is not None:
+        del instance._statistics_before
+        summaries.refresh(before)
+
+
+@receiver(pre_save, sender=models.Attribute)
+def attribute_changing(sender, instance, **kwargs):
+    if is_suspended() or not instance.pk:
+        return
+    # an update may move the attribute to another event
+    instance._spread_events = set(
+        sender.objects.filter(pk=instance.pk).values_list("event_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=models.Attribute)
+@receiver(post_delete, sender=models.Attribute)
+def attribute_changed(sender, instance, origin=None, **kwargs):
+    # spreads are cascade deleted together with their event
+    if is_suspended() or is_event_cascade(origin):
+        return
+    event_ids = getattr(instance, "_spread_events", set()) | {instance.event_id}
+    instance.__dict__.pop("_spread_events", None)
+    summaries.refresh_attribute_spreads(event_ids)
+
+
+# ================= Statistics cache and snapshot =================
+@receiver(post_save, sender=models.Event)
+@receiver(post_save, sender=models.ClaimedType)
+@receiver(post_save, sender=models.HostGalaxy)
+@receiver(post_save, sender=models.Attribute)
+@receiver(post_save, sender=Source)
+@receiver(post_save, sender=Galaxy)
+@receiver(post_save, sender=SubType)
+@receiver(post_delete, sender=models.Event)
+@receiver(post_delete, sender=models.ClaimedType)
+@receiver(post_delete, sender=models.HostGalaxy)
+@receiver(post_delete, sender=models.Attribute)
+def catalog_written(sender, **kwargs):
+    if not is_suspended():
+        statistics.bump_generation()
+
+
+@receiver(post_save, sender=models.ClaimedType)
+@receiver(post_save, sender=models.HostGalaxy)
+@receiver(post_save, sender=models.Attribute)
+@receiver(post_delete, sender=models.ClaimedType)
+@receiver(post_delete, sender=models.HostGalaxy)
+@receiver(post_delete, sender=models.Attribute)
+def snapshot_tables_written(sender, **kwargs):
+    if not is_suspended():
+        invalidate(snapshot.mark_stale)
@@ -0,0 +1,257 @@
+"""
+Columnar binary snapshot of the attribute and claim tables for analytics.
+
+Every column is an .npy file opened with np.load(mmap_mode="r"), so worker
+processes share the same page cache instead of each loading rows through the
+ORM. Foreign keys are stored as integer ids and attribute names as int8 codes
+into a string dictionary kept in the manifest.
+
+A snapshot is written to a new directory and published by atomically replacing
+manifest.json, so readers never see a partial snapshot. Rebuilds hold a lock
+file in the snapshot directory, so only one process writes at a time. Catalog writes mark the
+published snapshot stale, once when the row is written and again when the
+transaction commits. A stale snapshot is not read from, and the next read
+rebuilds it once CATALOG_SNAPSHOT_REBUILD_INTERVAL seconds have passed since it
+was built, see current().
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import models
+
+MANIFEST = "manifest.json"
+STALE_MARKER = "stale"
+LOCK_FILE = "rebuild.lock"
+SNAPSHOT_PREFIX = "snapshot-"
+BUILDING_PREFIX = "building-"
+ATTRIBUTE_NAMES = list(models.AttributeName.values)
+ATTRIBUTE_CODES = {name: code for code, name in enumerate(ATTRIBUTE_NAMES)}
+
+# table: (model, {column: (field, dtype)})
+TABLES = {
+    "attribute": (
+        models.Attribute,
+        {
+            "event": ("event_id", np.int64),
+            "source": ("source_id", np.int64),
+            "name": ("name", np.int8),
+            "value": ("value", np.float64),
+            "normalized_value": ("normalized_value", np.float64),
+        },
+    ),
+    "claimed_type": (
+        models.ClaimedType,
+        {
+            "event": ("event_id", np.int64),
+            "sub_type": ("sub_type_id", np.int64),
+            "source": ("source_id", np.int64),
+        },
+    ),
+    "host_galaxy": (
+        models.HostGalaxy,
+        {
+            "event": ("event_id", np.int64),
+            "galaxy": ("galaxy_id", np.int64),
+            "source": ("source_id", np.int64),
+        },
+    ),
+}
+
+_rebuild_lock = threading.Lock()
+_opened = {}
+
+
+def snapshot_directory():
+    """Snapshots of each database live apart, so test runs never touch the real one"""
+    database = str(connection.settings_dict["NAME"])
+    digest = hashlib.md5(database.encode()).hexdigest()[:12]
+    return Path(settings.CATALOG_SNAPSHOT_DIR) / f"{connection.vendor}-{digest}"
+
+
+# ================= Writing =================
+@contextmanager
+def rebuild_lock(directory, blocking=True):
+    """
+    Exclusive lock on the snapshot directory held while a snapshot is written,
+    so rebuilds in different processes run one at a time. Without blocking,
+    raises BlockingIOError when a rebuild is already running.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    if not _rebuild_lock.acquire(blocking):
+        raise BlockingIOError("A snapshot rebuild is running")
+    try:
+        with open(directory / LOCK_FILE, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    finally:
+        _rebuild_lock.release()
+
+
+def write_snapshot():
+    """Write every table column by column and publish the result, returns the Snapshot"""
+    directory = snapshot_directory()
+    with rebuild_lock(directory):
+        return _write(directory)
+
+
+def _write(directory):
+    # writes landing while the snapshot is read are newer than built_at, so they
+    # leave it stale
+    built_at = time.time()
+    # built under a prefix _remove_old() never touches, renamed once complete
+    building = Path(tempfile.mkdtemp(prefix=BUILDING_PREFIX, dir=directory))
+
+    counts = {}
+    with transaction.atomic():
+        for table, (model, columns) in TABLES.items():
+            fields = [field for field, _ in columns.values()]
+            rows = list(model.objects.order_by("id").values_list(*fields))
+            values = list(zip(*rows)) or [()] * len(fields)
+            for (column, (field, dtype)), column_values in zip(columns.items(), values):
+                if field == "name":
+                    column_values = [ATTRIBUTE_CODES[name] for name in column_values]
+                np.save(building / f"{table}.{column}.npy", np.array(column_values, dtype=dtype))
+            counts[table] = len(rows)
+
+    target = directory / f"{SNAPSHOT_PREFIX}{building.name.removeprefix(BUILDING_PREFIX)}"
+    os.rename(building, target)
+
+    previous = read_manifest()
+    manifest = {
+        "path": target.name,
+        "built_at": built_at,
+        "counts": counts,
+        "dictionaries": {"attribute.name": ATTRIBUTE_NAMES},
+    }
+    staging = directory / f"{MANIFEST}.{target.name}"
+    staging.write_text(json.dumps(manifest))
+    os.replace(staging, directory / MANIFEST)
+
+    if previous is not None:
+        _remove_old(directory, previous["path"])
+    return _open(directory, manifest)
+
+
+def _remove_old(directory, previous):
+    """
+    Remove the snapshots published before the previous one. Readers that opened
+    the previous snapshot just before it was replaced can still read it.
+    """
+    try:
+        cutoff = (directory / previous).stat().st_mtime_ns
+    except FileNotFoundError:
+        return
+    # processes still mapping removed files keep reading them until they reopen
+    for path in directory.glob(f"{SNAPSHOT_PREFIX}*"):
+        if path.is_dir() and path.name != previous and path.stat().st_mtime_ns < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def mark_stale():
+    marker = snapshot_directory() / STALE_MARKER
+    if marker.parent.exists():
+        marker.touch()
+
+
+# ================= Reading =================
+def read_manifest():
+    try:
+        return json.loads((snapshot_directory() / MANIFEST).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def is_stale(manifest):
+    try:
+        changed_at = (snapshot_directory() / STALE_MARKER).stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return changed_at >= manifest["built_at"]
+
+
+def current(rebuild=True):
+    """
+    The published snapshot if no write happened since it was built, else None.
+
+    A stale snapshot older than the rebuild interval is rebuilt first, inline:
+    the read that finds it pays for the rebuild, while concurrent reads find the
+    lock taken and fall back to the database instead of waiting. With the
+    interval set to None reads never rebuild, and the snapshot is kept fresh by
+    running the write_catalog_snapshot command periodically.
+    """
+    manifest = read_manifest()
+    if manifest is None:
+        return None
+
+    if is_stale(manifest):
+        interval = settings.CATALOG_SNAPSHOT_REBUILD_INTERVAL
+        age = time.time() - manifest["built_at"]
+        if not rebuild or interval is None or age < interval:
+            return None
+        directory = snapshot_directory()
+        try:
+            with rebuild_lock(directory, blocking=False):
+                # another thread or process may have rebuilt it before this one got the lock
+                manifest = read_manifest()
+                if manifest is None or is_stale(manifest):
+                    return _write(directory)
+        except BlockingIOError:
+            return None
+
+    return _open(snapshot_directory(), manifest)
+
+
+def _open(directory, manifest):
+    # one instance per process, so its mapped columns are reused across reads
+    key = (directory, manifest["path"])
+    if key not in _opened:
+        _opened.clear()
+        _opened[key] = Snapshot(directory, manifest)
+    return _opened[key]
+
+
+class Snapshot:
+    """Read-only memory-mapped columns of one published snapshot"""
+
+    def __init__(self, directory, manifest):
+        self.path = Path(directory) / manifest["path"]
+        self.manifest = manifest
+        self._columns = {}
+
+    def column(self, table, column):
+        key = f"{table}.{column}"
+        if key not in self._columns:
+            self._columns[key] = np.load(self.path / f"{key}.npy", mmap_mode="r")
+        return self._columns[key]
+
+    def attribute_values(self, name, sub_type_id=None, galaxy_id=None):
+        """Normalized values of one attribute, as statistics.attribute_values()"""
+        names = self.manifest["dictionaries"]["attribute.name"]
+        mask = self.column("attribute", "name") == names.index(name)
+
+        events = self.column("attribute", "event")
+        if sub_type_id is not None:
+            claimed = self.column("claimed_type", "sub_type") == sub_type_id
+            mask &= np.isin(events, self.column("claimed_type", "event")[claimed])
+        if galaxy_id is not None:
+            hosted = self.column("host_galaxy", "galaxy") == galaxy_id
+            mask &= np.isin(events, self.column("host_galaxy", "event")[hosted])
+
+        values = self.column("attribute", "normalized_value")[mask]
+        return values[np.isfinite(values)]
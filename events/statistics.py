@@ -0,0 +1,336 @@
+"""
+Statistics service shared by the API and the frontend graphs.
+
+Results are cached per parameter set under a catalog generation counter. Any
+write to events, claims or attributes bumps the generation, which retires every
+cached result at once without having to know which keys it affected. Results
+are cached per process, the counter is a database row shared by all of them.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from itertools import groupby
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F
+
+from . import models, snapshot
+
+GENERATION_ID = 1
+CACHE_TIMEOUT = 60 * 60
+LOCK_STRIPES = 64
+DISTRIBUTION_BINS = 20
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_MISSING = object()
+# concurrent misses of one key wait on the same lock and compute once
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+# an asyncio.Lock binds to the loop that first waits on it, and every async view
+# served under WSGI runs in a loop of its own, so each loop gets its own stripes
+_async_locks = weakref.WeakKeyDictionary()
+_async_locks_guard = threading.Lock()
+
+
+# ================= Generation-versioned cache =================
+# the generation is read from the database, so a bump made by another process
+# (a worker, bulk_import, verify_statistics --repair) retires results cached here
+def _generation_row():
+    return models.CatalogGeneration.objects.filter(pk=GENERATION_ID)
+
+
+def generation():
+    value = _generation_row().values_list("value", flat=True).first()
+    if value is None:
+        # start from the clock so a recreated row never reuses old keys
+        row, _ = models.CatalogGeneration.objects.get_or_create(
+            pk=GENERATION_ID, defaults={"value": time.time_ns()}
+        )
+        value = row.value
+    return value
+
+
+def bump_generation():
+    if not _generation_row().update(value=F("value") + 1):
+        generation()
+
+
+async def ageneration():
+    value = await _generation_row().values_list("value", flat=True).afirst()
+    if value is None:
+        row, _ = await models.CatalogGeneration.objects.aget_or_create(
+            pk=GENERATION_ID, defaults={"value": time.time_ns()}
+        )
+        value = row.value
+    return value
+
+
+def cache_key(name, params, generation):
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f"statistics:{name}:{generation}:{digest}"
+
+
+def cached(name, params, compute):
+    """Return compute() cached under name, params and the current generation"""
+    key = cache_key(name, params, generation())
+
+    result = cache.get(key, _MISSING)
+    if result is not _MISSING:
+        return result
+
+    with _locks[hash(key) % LOCK_STRIPES]:
+        result = cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = compute()
+            cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+def _async_lock(key):
+    loop = asyncio.get_running_loop()
+    with _async_locks_guard:
+        stripes = _async_locks.get(loop)
+        if stripes is None:
+            stripes = _async_locks[loop] = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+    return stripes[hash(key) % LOCK_STRIPES]
+
+
+async def acached(name, params, acompute):
+    """Async cached(): acompute is a coroutine function, the cache key is shared"""
+    key = cache_key(name, params, await ageneration())
+
+    result = await cache.aget(key, _MISSING)
+    if result is not _MISSING:
+        return result
+
+    async with _async_lock(key):
+        result = await cache.aget(key, _MISSING)
+        if result is _MISSING:
+            result = await acompute()
+            await cache.aset(key, result, CACHE_TIMEOUT)
+    return result
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+class CachedRanking:
+    """
+    Countable and sliceable view of a ranking query, so it can be handed to a
+    paginator or cut to a top N. The count and every slice are cached.
+    """
+
+    def __init__(self, name, queryset, params):
+        self.name = name
+        self.queryset = queryset
+        self.params = params
+
+    def count(self):
+        return cached(f"{self.name}:count", self.params, self.queryset.count)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        params = {**self.params, "start": index.start, "stop": index.stop}
+        return cached(self.name, params, lambda: list(self.queryset[index]))
+
+    def __iter__(self):
+        return iter(self[:])
+
+    async def aslice(self, start=None, stop=None):
+        params = {**self.params, "start": start, "stop": stop}
+        return await acached(
+            self.name, params, lambda: alist(self.queryset[start:stop])
+        )
+
+
+# ================= Statistics =================
+def galaxy_supernova_counts(top_n=None, min_count=None):
+    """Galaxies ranked by the number of events they host"""
+    queryset = (
+        models.GalaxyStatistics.objects.filter(event_count__gt=0)
+        .values("galaxy_id", "galaxy__name", supernova_count=F("event_count"))
+        .order_by("-event_count", "galaxy__name", "galaxy_id")
+    )
+    if min_count:
+        queryset = queryset.filter(event_count__gte=min_count)
+    if top_n:
+        queryset = queryset[:top_n]
+    return CachedRanking(
+        "galaxy_supernova_counts", queryset, {"top_n": top_n, "min_count": min_count}
+    )
+
+
+def galaxy_supernova_diversity():
+    """Galaxies ranked by the number of distinct subtypes among their events"""
+    queryset = (
+        models.GalaxyStatistics.objects.filter(subtype_count__gt=0)
+        .values("galaxy_id", "galaxy__name", supernova_type_count=F("subtype_count"))
+        .order_by("-subtype_count", "galaxy__name", "galaxy_id")
+    )
+    return CachedRanking("galaxy_supernova_diversity", queryset, {})
+
+
+def supernova_uncertainty():
+    """Events ranked by the number of distinct subtype and host claims"""
+    queryset = models.Event.objects.values(
+        "name",
+        "distinct_subtypes",
+        "distinct_hosts",
+        "total_sources",
+    ).order_by("-total_sources", "id")
+    return CachedRanking("supernova_uncertainty", queryset, {})
+
+
+def subtype_conflicts():
+    """Subtypes ranked by the number of events with conflicting subtype claims"""
+    queryset = (
+        models.SubTypeStatistics.objects.filter(conflicted_event_count__gt=0)
+        .values("sub_type_id", "sub_type__name", "conflicted_event_count")
+        .order_by("-conflicted_event_count", "sub_type_id")
+    )
+    return CachedRanking("subtype_conflicts", queryset, {})
+
+
+def attribute_disagreement(name=None):
+    """(event, attribute) pairs ranked by the relative spread of their source values"""
+    queryset = (
+        models.AttributeSpread.objects.filter(relative_std__isnull=False)
+        .values(
+            "id",
+            "event__name",
+            "name",
+            "value_count",
+            "min_value",
+            "max_value",
+            "relative_std",
+        )
+        .order_by("-relative_std", "id")
+    )
+    if name:
+        queryset = queryset.filter(name=name)
+    return CachedRanking("attribute_disagreement", queryset, {"name": name})
+
+
+def attribute_distribution(name, sub_type_id=None, galaxy_id=None, bins=DISTRIBUTION_BINS):
+    """Summary statistics and histogram of one attribute across events"""
+    params = {"name": name, "sub_type_id": sub_type_id, "galaxy_id": galaxy_id, "bins": bins}
+    return cached(
+        "attribute_distribution",
+        params,
+        lambda: describe(attribute_values(name, sub_type_id, galaxy_id), bins),
+    )
+
+
+def attribute_values(name, sub_type_id=None, galaxy_id=None):
+    """Every value of the attribute in its canonical unit as a float array, read in one query"""
+    published = snapshot.current()
+    if published is not None:
+        return published.attribute_values(name, sub_type_id, galaxy_id)
+
+    queryset = models.Attribute.objects.filter(name=name)
+    # filter through subqueries so an event claimed by several sources counts once
+    if sub_type_id is not None:
+        queryset = queryset.filter(
+            event_id__in=models.ClaimedType.objects.filter(sub_type_id=sub_type_id).values("event_id")
+        )
+    if galaxy_id is not None:
+        queryset = queryset.filter(
+            event_id__in=models.HostGalaxy.objects.filter(galaxy_id=galaxy_id).values("event_id")
+        )
+    values = np.fromiter(
+        queryset.values_list("normalized_value", flat=True).iterator(chunk_size=10_000),
+        dtype=np.float64,
+    )
+    return values[np.isfinite(values)]
+
+
+def describe(values, bins=DISTRIBUTION_BINS):
+    if not values.size:
+        return {
+            "count": 0,
+            "mean": None,
+            "std": None,
+            "min": None,
+            "max": None,
+            "percentiles": {str(p): None for p in PERCENTILES},
+            "histogram": {"edges": [], "counts": []},
+        }
+
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": dict(
+            zip(map(str, PERCENTILES), np.percentile(values, PERCENTILES).tolist())
+        ),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+    }
+
+
+def _galaxy_event_rows(galaxy_ids):
+    return (
+        models.HostGalaxy.objects.filter(galaxy_id__in=galaxy_ids)
+        .values_list("galaxy_id", "event__name")
+        .distinct()
+        .order_by("galaxy_id", "event__name")
+    )
+
+
+def _galaxy_subtype_rows(galaxy_ids):
+    return (
+        models.HostGalaxy.objects.filter(galaxy_id__in=galaxy_ids)
+        .exclude(event__claimed_types__sub_type__isnull=True)
+        .values_list("galaxy_id", "event__claimed_types__sub_type__name")
+        .distinct()
+        .order_by("galaxy_id", "event__claimed_types__sub_type__name")
+    )
+
+
+def galaxy_event_names(galaxy_ids):
+    """{galaxy id: sorted names of the events it hosts}"""
+    return cached(
+        "galaxy_event_names",
+        {"galaxy_ids": sorted(galaxy_ids)},
+        lambda: _group_names(_galaxy_event_rows(galaxy_ids)),
+    )
+
+
+async def agalaxy_event_names(galaxy_ids):
+    async def compute():
+        return _group_names(await alist(_galaxy_event_rows(galaxy_ids)))
+
+    return await acached("galaxy_event_names", {"galaxy_ids": sorted(galaxy_ids)}, compute)
+
+
+def galaxy_subtype_names(galaxy_ids):
+    """{galaxy id: sorted names of the subtypes claimed for its events}"""
+    return cached(
+        "galaxy_subtype_names",
+        {"galaxy_ids": sorted(galaxy_ids)},
+        lambda: _group_names(_galaxy_subtype_rows(galaxy_ids)),
+    )
+
+
+async def agalaxy_subtype_names(galaxy_ids):
+    async def compute():
+        return _group_names(await alist(_galaxy_subtype_rows(galaxy_ids)))
+
+    return await acached("galaxy_subtype_names", {"galaxy_ids": sorted(galaxy_ids)}, compute)
+
+
+def _group_names(rows):
+    return {
+        galaxy_id: [name for _, name in group]
+        for galaxy_id, group in groupby(rows, key=lambda r: r[0])
+    }
@@ -0,0 +1,350 @@
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import models, snapshot, statistics
+
+BATCH_SIZE = 500
+# events per vectorized attribute spread batch
+SPREAD_BATCH_SIZE = 5000
+
+
+# ================= Full recompute =================
+def compute_event_statistics():
+    """{event id: (distinct subtypes, distinct hosts)} computed from the claim tables"""
+    rows = models.Event.objects.annotate(
+        subtype_count=Count("claimed_types__sub_type", distinct=True),
+        host_count=Count("host_galaxies__galaxy", distinct=True),
+    ).values_list("id", "subtype_count", "host_count")
+    return {pk: (subtypes, hosts) for pk, subtypes, hosts in rows}
+
+
+def compute_galaxy_statistics(galaxy_ids=None):
+    """{galaxy id: (hosted events, distinct subtypes of those events)}"""
+    hosts = models.HostGalaxy.objects.all()
+    if galaxy_ids is not None:
+        hosts = hosts.filter(galaxy_id__in=galaxy_ids)
+    rows = (
+        hosts.values("galaxy_id")
+        .annotate(
+            event_count=Count("event", distinct=True),
+            subtype_count=Count("event__claimed_types__sub_type", distinct=True),
+        )
+        .values_list("galaxy_id", "event_count", "subtype_count")
+    )
+    return {pk: (events, subtypes) for pk, events, subtypes in rows}
+
+
+def compute_subtype_statistics():
+    """{subtype id: number of events with conflicting subtype claims citing it}"""
+    # find events with multiple subtype claims
+    conflicted_events = (
+        models.ClaimedType.objects.values("event")
+        .annotate(subtype_count=Count("sub_type", distinct=True))
+        .filter(subtype_count__gt=1)
+        .values_list("event", flat=True)
+    )
+    rows = (
+        models.ClaimedType.objects.filter(event__in=conflicted_events)
+        .values("sub_type_id")
+        .annotate(conflicted_event_count=Count("event", distinct=True))
+        .values_list("sub_type_id", "conflicted_event_count")
+    )
+    return dict(rows)
+
+
+def compute_attribute_spreads(event_ids=None, batch_size=SPREAD_BATCH_SIZE):
+    """
+    Yield an unsaved AttributeSpread for every (event, attribute) with more than
+    one value, computed over batches of events with NumPy.
+    """
+    # values in a unit without a conversion cannot be compared
+    attributes = models.Attribute.objects.filter(normalized_value__isnull=False)
+    if event_ids is not None:
+        attributes = attributes.filter(event_id__in=event_ids)
+    ids = list(attributes.values_list("event_id", flat=True).distinct().order_by("event_id"))
+
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        rows = (
+            attributes.filter(event_id__gte=batch[0], event_id__lte=batch[-1])
+            .order_by("event_id", "name", "id")
+            .values_list("event_id", "name", "normalized_value")
+        )
+        for event_id, name, count, low, high, relative_std in group_spreads(list(rows)):
+            yield models.AttributeSpread(
+                event_id=event_id,
+                name=name,
+                value_count=count,
+                min_value=low,
+                max_value=high,
+                relative_std=relative_std,
+            )
+
+
+def group_spreads(rows):
+    """
+    (event id, name, count, min, max, relative std) per (event id, name) group of
+    rows sorted by event id and name, skipping groups with a single value.
+    """
+    if not rows:
+        return []
+    event_ids, names, values = zip(*rows)
+    event_ids = np.array(event_ids, dtype=np.int64)
+    names = np.array(names)
+    values = np.array(values, dtype=np.float64)
+
+    finite = np.isfinite(values)
+    event_ids, names, values = event_ids[finite], names[finite], values[finite]
+    if not values.size:
+        return []
+
+    boundary = (event_ids[1:] != event_ids[:-1]) | (names[1:] != names[:-1])
+    starts = np.flatnonzero(np.concatenate(([True], boundary)))
+    counts = np.diff(np.append(starts, values.size))
+
+    lows = np.minimum.reduceat(values, starts)
+    highs = np.maximum.reduceat(values, starts)
+    means = np.add.reduceat(values, starts) / counts
+    deviations = (values - np.repeat(means, counts)) ** 2
+    # identical values would otherwise leave rounding noise in the mean
+    stds = np.where(highs > lows, np.sqrt(np.add.reduceat(deviations, starts) / counts), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(means != 0, stds / np.abs(means), np.nan)
+
+    keep = counts > 1
+    return [
+        (
+            int(event_id),
+            str(name),
+            int(count),
+            float(low),
+            float(high),
+            None if np.isnan(rel) else float(rel),
+        )
+        for event_id, name, count, low, high, rel in zip(
+            event_ids[starts][keep],
+            names[starts][keep],
+            counts[keep],
+            lows[keep],
+            highs[keep],
+            relative[keep],
+        )
+    ]
+
+
+def rebuild_all_statistics():
+    """Replace every summary table with a full recompute, e.g. after a bulk import"""
+    with transaction.atomic():
+        refresh_event_counters()
+
+        models.GalaxyStatistics.objects.all().delete()
+        models.GalaxyStatistics.objects.bulk_create(
+            _galaxy_rows(compute_galaxy_statistics()), batch_size=BATCH_SIZE
+        )
+
+        models.SubTypeStatistics.objects.all().delete()
+        models.SubTypeStatistics.objects.bulk_create(
+            [
+                models.SubTypeStatistics(sub_type_id=pk, conflicted_event_count=count)
+                for pk, count in compute_subtype_statistics().items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        models.AttributeSpread.objects.all().delete()
+        models.AttributeSpread.objects.bulk_create(
+            compute_attribute_spreads(), batch_size=BATCH_SIZE
+        )
+    statistics.bump_generation()
+    snapshot.mark_stale()
+
+
+def refresh_event_counters(event_ids=None):
+    """
+    Recount the claim counters on Event in SQL, for the given events or the whole
+    table. Bulk writers that bypass signals call this for the events they touched.
+    """
+
+    def distinct_count(model, field):
+        counts = (
+            model.objects.filter(event=OuterRef("pk"))
+            .order_by()
+            .values("event")
+            .annotate(count=Count(field, distinct=True))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    events = models.Event.objects.all()
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+    events.update(
+        distinct_subtypes=distinct_count(models.ClaimedType, "sub_type"),
+        distinct_hosts=distinct_count(models.HostGalaxy, "galaxy"),
+    )
+    events.update(total_sources=F("distinct_subtypes") + F("distinct_hosts"))
+
+
+def _galaxy_rows(stats):
+    return [
+        models.GalaxyStatistics(
+            galaxy_id=pk, event_count=events, subtype_count=subtypes
+        )
+        for pk, (events, subtypes) in stats.items()
+    ]
+
+
+# ================= Incremental maintenance =================
+def capture(event_ids):
+    """
+    Snapshot the events a claim change is about to touch. The snapshot is handed
+    to refresh() once the change is written.
+    """
+    event_ids = set(event_ids)
+    return {
+        "subtypes": _event_subtypes(event_ids),
+        "galaxies": _hosting_galaxies(event_ids),
+    }
+
+
+def refresh(before):
+    """Bring the summary rows touched since capture() back in line"""
+    event_ids = set(before["subtypes"])
+    _apply_conflict_changes(before["subtypes"], _event_subtypes(event_ids))
+    refresh_event_counters(event_ids)
+    _refresh_galaxies(before["galaxies"] | _hosting_galaxies(event_ids))
+
+
+def refresh_attribute_spreads(event_ids):
+    """Recompute the attribute spreads of the given events after attribute writes"""
+    with transaction.atomic():
+        models.AttributeSpread.objects.filter(event_id__in=event_ids).delete()
+        models.AttributeSpread.objects.bulk_create(
+            compute_attribute_spreads(event_ids), batch_size=BATCH_SIZE
+        )
+
+
+def _event_subtypes(event_ids):
+    subtypes = {pk: set() for pk in event_ids}
+    rows = (
+        models.ClaimedType.objects.filter(event_id__in=event_ids)
+        .values_list("event_id", "sub_type_id")
+        .distinct()
+    )
+    for event_id, sub_type_id in rows:
+        subtypes[event_id].add(sub_type_id)
+    return subtypes
+
+
+def _hosting_galaxies(event_ids):
+    return set(
+        models.HostGalaxy.objects.filter(event_id__in=event_ids).values_list(
+            "galaxy_id", flat=True
+        )
+    )
+
+
+def _refresh_galaxies(galaxy_ids):
+    stats = compute_galaxy_statistics(galaxy_ids)
+    models.GalaxyStatistics.objects.filter(
+        galaxy_id__in=galaxy_ids - stats.keys()
+    ).delete()
+    models.GalaxyStatistics.objects.bulk_create(
+        _galaxy_rows(stats),
+        update_conflicts=True,
+        unique_fields=["galaxy"],
+        update_fields=["event_count", "subtype_count"],
+    )
+
+
+def _apply_conflict_changes(before, after):
+    """
+    Shift the conflict counter of every subtype whose events entered or left the
+    conflicted set, instead of recounting the subtype over the whole table.
+    """
+
+    def conflicting(subtypes):
+        return subtypes if len(subtypes) > 1 else set()
+
+    deltas = Counter()
+    for event_id in before:
+        old = conflicting(before[event_id])
+        new = conflicting(after.get(event_id, set()))
+        deltas.update(new - old)
+        deltas.subtract(old - new)
+
+    by_delta = defaultdict(list)
+    for sub_type_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(sub_type_id)
+
+    for delta, sub_type_ids in by_delta.items():
+        models.SubTypeStatistics.objects.bulk_create(
+            [models.SubTypeStatistics(sub_type_id=pk) for pk in sub_type_ids],
+            ignore_conflicts=True,
+        )
+        models.SubTypeStatistics.objects.filter(sub_type_id__in=sub_type_ids).update(
+            conflicted_event_count=F("conflicted_event_count") + delta
+        )
+
+
+# ================= Verification =================
+def find_mismatches():
+    """
+    Compare every summary table against a full recompute. Returns
+    (table, key, stored, expected) for each row that differs.
+    """
+    stored_events = {
+        pk: (subtypes, hosts, total)
+        for pk, subtypes, hosts, total in models.Event.objects.values_list(
+            "id", "distinct_subtypes", "distinct_hosts", "total_sources"
+        )
+    }
+    expected_events = {
+        pk: (subtypes, hosts, subtypes + hosts)
+        for pk, (subtypes, hosts) in compute_event_statistics().items()
+    }
+
+    stored_galaxies = {
+        pk: (events, subtypes)
+        for pk, events, subtypes in models.GalaxyStatistics.objects.values_list(
+            "galaxy_id", "event_count", "subtype_count"
+        )
+    }
+
+    # subtypes leaving every conflict keep a zero row
+    stored_subtypes = dict(
+        models.SubTypeStatistics.objects.filter(conflicted_event_count__gt=0).values_list(
+            "sub_type_id", "conflicted_event_count"
+        )
+    )
+
+    stored_spreads = {
+        (event_id, name): values
+        for event_id, name, *values in models.AttributeSpread.objects.values_list(
+            "event_id", "name", "value_count", "min_value", "max_value", "relative_std"
+        )
+    }
+    expected_spreads = {
+        (s.event_id, s.name): [s.value_count, s.min_value, s.max_value, s.relative_std]
+        for s in compute_attribute_spreads()
+    }
+
+    return [
+        *_diff("event", stored_events, expected_events),
+        *_diff("galaxy", stored_galaxies, compute_galaxy_statistics()),
+        *_diff("subtype", stored_subtypes, compute_subtype_statistics()),
+        *_diff("attribute spread", stored_spreads, expected_spreads),
+    ]
+
+
+def _diff(table, stored, expected):
+    return [
+        (table, key, stored.get(key), expected.get(key))
+        for key in sorted(stored.keys() | expected.keys())
+        if stored.get(key) != expected.get(key)
+    ]
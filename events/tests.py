@@ -1,8 +1,47 @@
-from django.test import TestCase
+import asyncio
+import base64
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+import timeit
+from collections import Counter, defaultdict
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from .models import Event, AttributeName
+from .models import (
+    Event,
+    EventDocument,
+    GalaxyStatistics,
+    AttributeSpread,
+    AttributeName,
+    ClaimedType,
+    HostGalaxy,
+    Attribute,
+)
+from .serializers import EventOSCSchemaSerializer
+from .views import StatisticsPagination
+from .units import UnitError
+from .jsonstream import iter_json_items
+from .signals import suspended
+from .documents import get_document
+from .summaries import find_mismatches, group_spreads, refresh_attribute_spreads, refresh_event_counters
+from . import documents, snapshot, statistics
 from .factories import (
     EventFactory,
     ClaimedTypeFactory,
@@ -12,6 +51,8 @@ from .factories import (
 from sources.factories import SourceFactory
 from subtypes.factories import SubTypeFactory
 from galaxies.factories import GalaxyFactory
+from galaxies.models import Galaxy
+from sources.models import Source
 
 
 class EventAPITest(APITestCase):
@@ -138,6 +179,34 @@ class EventAPITest(APITestCase):
         self.assertEqual(len(velocity_entries), 1)
         self.assertNotIn(",", velocity_entries[0]["source"])
 
+    def _create_event_with_claims(self, name, claim_count):
+        event = EventFactory(name=name)
+        for _ in range(claim_count):
+            source = SourceFactory()
+            ClaimedTypeFactory(event=event, source=source)
+            HostGalaxyFactory(event=event, source=source)
+            AttributeFactory(event=event, source=source)
+        return event
+
+    def test_retrieve_query_count_independent_of_claims(self):
+        """
+        Retrieving an event must cost the same number of queries whether it has
+        one claim or many.
+        """
+        small = self._create_event_with_claims("SN2024small", 1)
+        large = self._create_event_with_claims("SN2024large", 25)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            response = self.client.get(f"/api/events/{small.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.client.get(f"/api/events/{large.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["SN2024large"]["claimedtype"]), 25)  # type: ignore
+
+        self.assertEqual(len(small_queries), len(large_queries))
+
     def test_list_events_with_pagination(self):
         """
         Test list endpoint with pagination
@@ -176,6 +245,1525 @@ class EventAPITest(APITestCase):
         self.assertIsNone(response_page2.data["next"])  # type: ignore
 
 
+class EventCursorPaginationAPITest(APITestCase):
+    """Test keyset pagination of the events list"""
+
+    def _collect(self, url):
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)  # type: ignore
+            names.extend(e["name"] for e in response.data["results"])  # type: ignore
+            url = response.data["next"]  # type: ignore
+        return names
+
+    def test_cursor_pages_by_name(self):
+        """
+        Cursor mode walks every event exactly once in the requested order.
+        """
+        events = [EventFactory(name=f"SN2024{c}") for c in "dbeac"]
+
+        names = self._collect("/api/events/?pagination=cursor&ordering=name&page_size=2")
+
+        self.assertEqual(names, sorted(e.name for e in events))
+
+    def test_cursor_is_stable_under_inserts(self):
+        """
+        Rows inserted behind the cursor neither shift nor duplicate later pages.
+        """
+        [EventFactory() for _ in range(4)]
+        first = self.client.get("/api/events/?pagination=cursor&page_size=2")
+        seen = [e["name"] for e in first.data["results"]]  # type: ignore
+
+        Event.objects.filter(name=seen[0]).delete()
+        EventFactory()
+        seen.extend(self._collect(first.data["next"]))  # type: ignore
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 5)
+
+
+class EventAttributeFilterAPITest(APITestCase):
+    """Test attribute range filters on the events list"""
+
+    def setUp(self):
+        self.near_bright = EventFactory(name="SN near bright")
+        AttributeFactory(event=self.near_bright, name=AttributeName.REDSHIFT, value=0.02)
+        AttributeFactory(event=self.near_bright, name=AttributeName.MAX_ABS_MAG, value=-19.5)
+        self.near_faint = EventFactory(name="SN near faint")
+        AttributeFactory(event=self.near_faint, name=AttributeName.REDSHIFT, value=0.04)
+        AttributeFactory(event=self.near_faint, name=AttributeName.MAX_ABS_MAG, value=-17.0)
+        self.far = EventFactory(name="SN far")
+        AttributeFactory(event=self.far, name=AttributeName.REDSHIFT, value=0.3)
+        AttributeFactory(event=self.far, name=AttributeName.REDSHIFT, value=0.03)  # other source
+        EventFactory(name="SN bare")
+
+    def names(self, params):
+        response = self.client.get("/api/events/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [e["name"] for e in response.data["results"]]  # type: ignore
+
+    def test_range_filters(self):
+        """
+        Lookups on one attribute combine, and every attribute must match.
+        """
+        self.assertEqual(
+            self.names({"redshift__gte": 0.01, "redshift__lte": 0.05}),
+            ["SN near bright", "SN near faint", "SN far"],
+        )
+        self.assertEqual(
+            self.names({"redshift__lt": 0.05, "maxabsmag__lt": -19}),
+            ["SN near bright"],
+        )
+        self.assertEqual(
+            self.names({"redshift__gt": 0.1, "pagination": "cursor"}),
+            ["SN far"],
+        )
+
+    def test_invalid_filters(self):
+        """
+        Unknown lookups and non numeric values are rejected.
+        """
+        for params in [{"redshift__in": 1}, {"redshift": 1}, {"redshift__lt": "x"}, {"redshift__lt": "nan"}]:
+            with self.subTest(params=params):
+                response = self.client.get("/api/events/", params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_uses_name_value_index(self):
+        """
+        Every range subquery is answered by the (name, value) index.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan check is SQLite specific")
+        plan = Event.objects.with_attribute_ranges(
+            {"redshift": {"gte": 0.01}, "maxabsmag": {"lt": -19}}
+        ).explain()
+        self.assertEqual(plan.count("events_attr_name_norm_idx"), 2)
+        self.assertNotIn("SCAN events_attribute", plan)
+
+
+class AttributeUnitTest(TestCase):
+    """Test canonical unit normalization of attribute values"""
+
+    def test_normalized_on_save(self):
+        """
+        Saving converts the value to the canonical unit and keeps the reported one.
+        """
+        attribute = AttributeFactory(name=AttributeName.VELOCITY, value=3000.0, unit="m/s")
+        self.assertEqual(attribute.normalized_value, 3.0)
+
+        attribute.value = 5000.0
+        attribute.save(update_fields=["value"])
+        attribute.refresh_from_db()
+        self.assertEqual(attribute.normalized_value, 5.0)
+
+        attribute = AttributeFactory(name=AttributeName.REDSHIFT, value=0.1, unit="")
+        self.assertEqual(attribute.normalized_value, 0.1)
+
+    def test_unknown_unit(self):
+        """
+        Units without a conversion are rejected.
+        """
+        with self.assertRaises(UnitError):
+            AttributeFactory(name=AttributeName.LUMDIST, value=1.0, unit="km/s")
+
+    def test_unknown_unit_backfill(self):
+        """
+        The normalized_value backfill keeps rows in a unit without a conversion,
+        with a NULL normalized value that filters and spreads leave out.
+        """
+        from django.apps import apps
+
+        backfill = importlib.import_module("events.migrations.0008_attribute_normalized_value")
+        event = AttributeFactory(name=AttributeName.LUMDIST, value=2.0, unit="Mpc").event
+        AttributeFactory(event=event, name=AttributeName.LUMDIST, value=3.0, unit="Mpc")
+        unknown = AttributeFactory(event=event, name=AttributeName.LUMDIST, value=1.0, unit="Mpc")
+        Attribute.objects.filter(pk=unknown.pk).update(unit="furlong")
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            backfill.normalize_values(apps, None)
+
+        self.assertIn("1 attributes have a unit without a conversion", output.getvalue())
+        unknown.refresh_from_db()
+        self.assertIsNone(unknown.normalized_value)
+        self.assertEqual(
+            list(Event.objects.with_attribute_ranges({"lumdist": {"lt": 10}})), [event]
+        )
+        refresh_attribute_spreads([event.pk])
+        self.assertEqual(AttributeSpread.objects.get(event=event).value_count, 2)
+
+    def test_filters_compare_canonical_values(self):
+        """
+        Range filters compare values reported in different units.
+        """
+        near = AttributeFactory(name=AttributeName.LUMDIST, value=900.0, unit="kpc").event
+        far = AttributeFactory(name=AttributeName.LUMDIST, value=2.0, unit="Gpc").event
+
+        self.assertEqual(
+            list(Event.objects.with_attribute_ranges({"lumdist": {"lt": 10}})), [near]
+        )
+        self.assertEqual(
+            list(Event.objects.with_attribute_ranges({"lumdist": {"gt": 1000}})), [far]
+        )
+
+
+class EventBatchAPITest(APITestCase):
+    """Test batch retrieval of OSC documents"""
+
+    def test_batch_by_ids_and_names(self):
+        """
+        Documents come back in request order, unknown keys are reported as missing.
+        """
+        events = [EventFactory() for _ in range(3)]
+        for event in events:
+            ClaimedTypeFactory(event=event)
+
+        response = self.client.post(
+            "/api/events/batch/",
+            {"ids": [events[2].id, 999999], "names": [events[0].name, "SN-unknown"]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [next(iter(d)) for d in response.data["results"]]  # type: ignore
+        self.assertEqual(names, [events[2].name, events[0].name])
+        self.assertEqual(response.data["missing"], [999999, "SN-unknown"])  # type: ignore
+
+    def test_batch_query_count_independent_of_size(self):
+        """
+        The whole batch is loaded with one set of bulk queries.
+        """
+        small = [EventFactory() for _ in range(2)]
+        large = [EventFactory() for _ in range(20)]
+        for event in small + large:
+            ClaimedTypeFactory(event=event)
+            HostGalaxyFactory(event=event)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.post("/api/events/batch/", {"ids": [e.id for e in small]}, format="json")
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.client.post("/api/events/batch/", {"ids": [e.id for e in large]}, format="json")
+
+        self.assertEqual(len(response.data["results"]), 20)  # type: ignore
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_batch_rejects_empty_request(self):
+        """
+        A batch must name at least one event.
+        """
+        response = self.client.post("/api/events/batch/", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventAutocompleteAPITest(APITestCase):
+    """Test event name autocomplete"""
+
+    def test_case_insensitive_prefix(self):
+        """
+        Names matching the prefix in any case come back sorted and limited.
+        """
+        for name in ["AT2021aczc", "AT2021acza", "at2021b", "SN2021x", "AT2020adat"]:
+            EventFactory(name=name)
+
+        response = self.client.get("/api/events/autocomplete", {"q": "at2021", "limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, ["AT2021acza", "AT2021aczc"])  # type: ignore
+
+    def test_empty_prefix(self):
+        """
+        An empty query suggests nothing.
+        """
+        EventFactory()
+        response = self.client.get("/api/events/autocomplete", {"q": " "})
+        self.assertEqual(response.data, [])  # type: ignore
+
+    def test_prefix_uses_name_index(self):
+        """
+        The prefix lookup is a range scan over the functional name index.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan check is SQLite specific")
+        plan = Event.objects.with_name_prefix("at2021").values("name")[:10].explain()
+        self.assertIn("events_event_name_lower_idx", plan)
+
+
+class EventExportAPITest(APITestCase):
+    """Test the NDJSON catalog export endpoint"""
+
+    def test_export_streams_one_document_per_line(self):
+        """
+        Every event is exported as one OSC document per line, in id order.
+        """
+        source = SourceFactory()
+        events = [EventFactory() for _ in range(3)]
+        ClaimedTypeFactory(event=events[0], source=source)
+        HostGalaxyFactory(event=events[2], source=source)
+
+        response = self.client.get("/api/events/export")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()  # type: ignore
+        documents = [json.loads(line) for line in lines]
+        self.assertEqual([next(iter(d)) for d in documents], [e.name for e in events])
+        self.assertEqual(len(documents[0][events[0].name]["claimedtype"]), 1)
+        self.assertEqual(len(documents[2][events[2].name]["hostgalaxy"]), 1)
+
+
+class EventDocumentTest(APITestCase):
+    """Test the materialized OSC document store"""
+
+    def setUp(self):
+        self.source = SourceFactory(name="Old Name")
+        self.event = EventFactory(name="SN2024doc")
+        self.claim = ClaimedTypeFactory(event=self.event, source=self.source)
+
+    def _retrieve(self):
+        return self.client.get(f"/api/events/{self.event.id}/").data[self.event.name]  # type: ignore
+
+    def test_retrieve_stores_document(self):
+        """
+        The first read materializes the document, later reads are served from it.
+        """
+        self.assertFalse(EventDocument.objects.filter(event=self.event).exists())
+        first = self._retrieve()
+        self.assertTrue(EventDocument.objects.filter(event=self.event).exists())
+
+        with self.assertNumQueries(1):
+            second = self._retrieve()
+        self.assertEqual(first, second)
+
+    def test_claim_changes_invalidate_document(self):
+        """
+        Adding or removing claims drops the stored document so the next read is fresh.
+        """
+        self._retrieve()
+        HostGalaxyFactory(event=self.event, source=self.source)
+        self.assertEqual(len(self._retrieve()["hostgalaxy"]), 1)
+
+        self.claim.delete()
+        self.assertEqual(self._retrieve()["claimedtype"], [])
+
+    def test_moved_claim_invalidates_both_documents(self):
+        """
+        Moving a claim or an attribute to another event refreshes the documents of both.
+        """
+        other = EventFactory(name="SN2024other")
+        attribute = AttributeFactory(event=self.event, source=self.source)
+        self._retrieve()
+        get_document(other.id)
+
+        self.claim.event = other
+        self.claim.save()
+        attribute.event = other
+        attribute.save()
+
+        document = self._retrieve()
+        self.assertEqual(document["claimedtype"], [])
+        self.assertEqual(document[attribute.name], [])
+        moved = get_document(other.id)[other.name]
+        self.assertEqual(len(moved["claimedtype"]), 1)
+        self.assertEqual(len(moved[attribute.name]), 1)
+
+    def test_write_during_build_not_stored(self):
+        """
+        A document built from a read taken before a concurrent write is not kept,
+        although the write's invalidation ran before it was stored.
+        """
+        build_documents = documents.build_documents
+
+        def build_then_write(events):
+            built = build_documents(events)
+            HostGalaxyFactory(event=self.event, source=self.source)
+            return built
+
+        with mock.patch.object(documents, "build_documents", side_effect=build_then_write):
+            self.assertEqual(self._retrieve()["hostgalaxy"], [])
+        self.assertFalse(EventDocument.objects.filter(event=self.event).exists())
+        self.assertEqual(len(self._retrieve()["hostgalaxy"]), 1)
+
+    def test_source_change_invalidates_document(self):
+        """
+        Renaming a referenced source refreshes the documents citing it.
+        """
+        self._retrieve()
+        self.source.name = "New Name"
+        self.source.save()
+        self.assertEqual(self._retrieve()["sources"][0]["name"], "New Name")
+
+    def test_rebuild_command(self):
+        """
+        The rebuild command regenerates a document for every event.
+        """
+        EventFactory()
+        call_command("rebuild_osc_documents", stdout=io.StringIO())
+        self.assertEqual(EventDocument.objects.count(), Event.objects.count())
+
+
+class EventOSCSchemaSerializerTest(TestCase):
+    """Test the exact OSC document produced by the serializer"""
+
+    def test_document_layout(self):
+        """
+        Sources are aliased in first-seen order and the serialized document keeps
+        its key order, so the JSON output is stable byte for byte.
+        """
+        source1 = SourceFactory(name="Source One", url="https://one", doi=None)
+        source2 = SourceFactory(name="Source Two", url=None, doi="10.1/two")
+        event = EventFactory(name="SN2024layout")
+        HostGalaxyFactory(event=event, galaxy=GalaxyFactory(name="NGC 1"), source=source2)
+        ClaimedTypeFactory(event=event, sub_type=SubTypeFactory(name="Ia"), source=source1)
+        ClaimedTypeFactory(event=event, sub_type=SubTypeFactory(name="II"), source=source2)
+        AttributeFactory(event=event, name=AttributeName.REDSHIFT, value=0.1, unit="", source=source1)
+        AttributeFactory(event=event, name=AttributeName.REDSHIFT, value=0.1, unit="", source=source2)
+        AttributeFactory(event=event, name=AttributeName.LUMDIST, value=5.0, unit="Mpc", source=source1)
+
+        expected = {
+            "SN2024layout": {
+                "schema": "https://github.com/astrocatalogs/supernovae/blob/d3ef5fc/SCHEMA.md",
+                "name": "SN2024layout",
+                "sources": [
+                    {"id": source2.id, "name": "Source Two", "url": None, "doi": "10.1/two", "secondary": False, "alias": "2"},
+                    {"id": source1.id, "name": "Source One", "url": "https://one", "doi": None, "secondary": False, "alias": "3"},
+                ],
+                "hostgalaxy": [{"source": "2", "name": "NGC 1"}],
+                "claimedtype": [{"source": "3", "name": "Ia"}, {"source": "2", "name": "II"}],
+                "lumdist": [{"source": "3", "name": "lumdist", "value": 5.0, "unit": "Mpc"}],
+                "velocity": [],
+                "redshift": [{"source": "3,2", "name": "redshift", "value": 0.1, "unit": ""}],
+                "maxabsmag": [],
+                "maxappmag": [],
+            }
+        }
+
+        data = EventOSCSchemaSerializer(Event.objects.with_osc_relations().get(pk=event.pk)).data
+        self.assertEqual(json.dumps(data), json.dumps(expected))
+
+
+@tag("benchmark")
+@skipUnless(os.environ.get("RUN_BENCHMARKS"), "set RUN_BENCHMARKS=1 to run the benchmarks")
+class EventOSCSchemaSerializerBenchmark(TestCase):
+    """
+    Micro-benchmark of OSC denormalization, skipped by default. Run with
+    `RUN_BENCHMARKS=1 uv run manage.py test --tag benchmark`.
+    """
+
+    repeat = 5
+
+    def _create_event(self, name, claim_count):
+        event = EventFactory(name=name)
+        sources = [SourceFactory() for _ in range(max(claim_count // 5, 1))]
+        subtypes = [SubTypeFactory() for _ in range(10)]
+        galaxies = [GalaxyFactory() for _ in range(10)]
+
+        claims, hosts, attributes = [], [], []
+        for i in range(claim_count):
+            source = sources[i % len(sources)]
+            claims.append(ClaimedType(event=event, sub_type=subtypes[i // len(sources) % 10], source=source))
+            hosts.append(HostGalaxy(event=event, galaxy=galaxies[i // len(sources) % 10], source=source))
+            attributes.append(
+                Attribute(
+                    event=event,
+                    name=AttributeName.values[i % len(AttributeName.values)],
+                    value=float(i % 7),
+                    unit="",
+                    source=source,
+                ).normalize()
+            )
+        ClaimedType.objects.bulk_create(claims, ignore_conflicts=True)
+        HostGalaxy.objects.bulk_create(hosts, ignore_conflicts=True)
+        Attribute.objects.bulk_create(attributes)
+        return Event.objects.with_osc_relations().get(pk=event.pk)
+
+    def test_serializer_scaling(self):
+        for claim_count in (10, 100, 1000):
+            event = self._create_event(f"SN2024bench{claim_count}", claim_count)
+            seconds = min(
+                timeit.repeat(
+                    lambda: EventOSCSchemaSerializer(event).data,
+                    number=1,
+                    repeat=self.repeat,
+                )
+            )
+            print(f"\nOSC serializer, {claim_count} claims: {seconds * 1000:.2f} ms")
+
+
+class GalaxySupernovaCountAPITest(APITestCase):
+    """Test galaxy ranking by hosted supernova count"""
+
+    def setUp(self):
+        cache.clear()
+        self.busy = GalaxyFactory(name="NGC busy")
+        self.quiet = GalaxyFactory(name="NGC quiet")
+        self.single = GalaxyFactory(name="NGC single")
+        for name in ["SN2024c", "SN2024a", "SN2024b"]:
+            event = EventFactory(name=name)
+            HostGalaxyFactory(event=event, galaxy=self.busy)
+            HostGalaxyFactory(event=event, galaxy=self.busy)  # second source, same event
+        for name in ["SN2024d", "SN2024e"]:
+            HostGalaxyFactory(event=EventFactory(name=name), galaxy=self.quiet)
+        HostGalaxyFactory(event=EventFactory(name="SN2024f"), galaxy=self.single)
+
+    def test_ranked_and_paginated(self):
+        """
+        Galaxies are ranked by distinct event count with sorted event names per galaxy,
+        and the cursor continues where the previous page stopped.
+        """
+        response = self.client.get("/api/events/galaxy-sn-count", {"limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],  # type: ignore
+            [
+                {"galaxy": "NGC busy", "supernova_count": 3, "supernova_events": ["SN2024a", "SN2024b", "SN2024c"]},
+                {"galaxy": "NGC quiet", "supernova_count": 2, "supernova_events": ["SN2024d", "SN2024e"]},
+            ],
+        )
+
+        response = self.client.get(response.data["next"])  # type: ignore
+        self.assertEqual([g["galaxy"] for g in response.data["results"]], ["NGC single"])  # type: ignore
+        self.assertIsNone(response.data["next"])  # type: ignore
+
+    def test_ordering(self):
+        """
+        Rankings can be ordered by any allowed field in either direction.
+        """
+        response = self.client.get("/api/events/galaxy-sn-count", {"ordering": "galaxy"})
+        self.assertEqual(
+            [g["galaxy"] for g in response.data["results"]],  # type: ignore
+            ["NGC busy", "NGC quiet", "NGC single"],
+        )
+
+        response = self.client.get("/api/events/galaxy-sn-count", {"ordering": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cursor(self):
+        """
+        Cursors that do not decode, or whose values do not suit the ordering, are rejected.
+        """
+        def cursor(position):
+            return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+        for position in [["a", 1], [None, None], [{"x": 1}, 1], [1.5, "z"], [True, 1], [1, 2**70]]:
+            response = self.client.get("/api/events/galaxy-sn-count", {"cursor": cursor(position)})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, position)
+        response = self.client.get("/api/events/galaxy-sn-count", {"cursor": "not base64!"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # a cursor kept after switching the ordering
+        first = self.client.get("/api/events/galaxy-sn-count", {"ordering": "galaxy", "limit": 1})
+        kept = parse_qs(urlparse(first.data["next"]).query)["cursor"][0]  # type: ignore
+        response = self.client.get("/api/events/galaxy-sn-count", {"cursor": kept})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/api/events/galaxy-sn-count", {"ordering": "galaxy", "cursor": kept})
+        self.assertEqual([g["galaxy"] for g in response.data["results"]], ["NGC quiet", "NGC single"])  # type: ignore
+
+    def test_top_n_and_min_count(self):
+        """
+        top_n caps the ranking and min_count drops galaxies below the threshold.
+        """
+        response = self.client.get("/api/events/galaxy-sn-count", {"top_n": 1})
+        self.assertEqual([g["galaxy"] for g in response.data["results"]], ["NGC busy"])  # type: ignore
+
+        response = self.client.get("/api/events/galaxy-sn-count", {"min_count": 2})
+        self.assertEqual(
+            [g["galaxy"] for g in response.data["results"]],  # type: ignore
+            ["NGC busy", "NGC quiet"],
+        )
+
+        response = self.client.get("/api/events/galaxy-sn-count", {"min_count": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_top_n_capped(self):
+        """
+        top_n is capped to the largest page size, on both endpoints.
+        """
+        for i in range(3):
+            HostGalaxyFactory(event=EventFactory(), galaxy=GalaxyFactory())
+        for prefix in ["/api/events/", "/api/async/events/"]:
+            with mock.patch.object(StatisticsPagination, "max_limit", 4):
+                response = self.client.get(f"{prefix}galaxy-sn-count", {"top_n": 10**12})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_stream(self):
+        """
+        Streaming mode returns every galaxy as one JSON object per line.
+        """
+        response = self.client.get("/api/events/galaxy-sn-count", {"stream": "1"})
+
+        lines = b"".join(response.streaming_content).decode().splitlines()  # type: ignore
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([r["galaxy"] for r in rows], ["NGC busy", "NGC quiet", "NGC single"])
+        self.assertEqual(rows[2]["supernova_events"], ["SN2024f"])
+
+
+class AsyncReadAPITest(APITestCase):
+    """Test the async read endpoints against their DRF counterparts"""
+
+    def setUp(self):
+        cache.clear()
+        galaxy = GalaxyFactory(name="NGC busy")
+        for name in ["SN2024a", "SN2024b", "AT2024c"]:
+            event = EventFactory(name=name)
+            HostGalaxyFactory(event=event, galaxy=galaxy)
+            ClaimedTypeFactory(event=event)
+        self.event = event
+
+    def test_matches_sync_endpoints(self):
+        """
+        Every async endpoint returns the same payload as the synchronous one.
+        """
+        for path, params in [
+            (f"{self.event.pk}/", {}),
+            ("autocomplete", {"q": "sn"}),
+            ("galaxy-sn-count", {"limit": 1}),
+            ("galaxy-sn-count", {"top_n": 1}),
+            ("galaxy-sn-diversity", {}),
+            ("supernova-uncertainty", {"ordering": "name"}),
+            ("subtype-uncertainty", {}),
+        ]:
+            with self.subTest(path=path, params=params):
+                expected = self.client.get(f"/api/events/{path}", params).json()
+                response = self.client.get(f"/api/async/events/{path}", params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                actual = response.json()
+                if isinstance(expected, dict) and expected.get("next"):
+                    # cursors are identical, only the mount point differs
+                    expected["next"] = expected["next"].replace("/api/events/", "/api/async/events/")
+                self.assertEqual(actual, expected)
+
+    def test_autocomplete_limit_matches_sync(self):
+        """
+        Out of range and unparseable limits fall back or clamp the same way on both endpoints.
+        """
+        for limit in ["0", "-5", "x", "", "1", "2", "1000"]:
+            params = {"q": "sn", "limit": limit}
+            expected = self.client.get("/api/events/autocomplete", params)
+            actual = self.client.get("/api/async/events/autocomplete", params)
+            self.assertEqual(actual.status_code, expected.status_code, limit)
+            self.assertEqual(actual.json(), expected.json(), limit)
+
+    def test_errors(self):
+        """
+        Unknown events are 404 and invalid parameters are 400, both as JSON.
+        """
+        response = self.client.get("/api/async/events/0/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get("/api/async/events/galaxy-sn-count", {"ordering": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", response.json())
+
+
+class AttributeDistributionAPITest(APITestCase):
+    """Test attribute distribution statistics"""
+
+    def setUp(self):
+        cache.clear()
+        self.ia = SubTypeFactory(name="Ia")
+        self.galaxy = GalaxyFactory()
+        for i, redshift in enumerate([0.1, 0.2, 0.3, 0.4]):
+            event = EventFactory()
+            AttributeFactory(event=event, name=AttributeName.REDSHIFT, value=redshift)
+            if i % 2:
+                ClaimedTypeFactory(event=event, sub_type=self.ia)
+                ClaimedTypeFactory(event=event, sub_type=self.ia)  # second source
+            else:
+                HostGalaxyFactory(event=event, galaxy=self.galaxy)
+        AttributeFactory(name=AttributeName.LUMDIST, value=100.0)
+
+    def test_statistics(self):
+        """
+        Count, moments, percentiles and histogram are computed over the attribute values.
+        """
+        response = self.client.get("/api/events/attribute-distribution/redshift", {"bins": 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data  # type: ignore
+        self.assertEqual(data["attribute"], "redshift")
+        self.assertEqual(data["count"], 4)
+        self.assertAlmostEqual(data["mean"], 0.25)
+        self.assertAlmostEqual(data["std"], 0.111803398875)
+        self.assertAlmostEqual(data["percentiles"]["50"], 0.25)
+        self.assertEqual(data["histogram"]["counts"], [1, 1, 1, 1])
+        self.assertEqual(len(data["histogram"]["edges"]), 5)
+
+    def test_filters(self):
+        """
+        Subtype and galaxy filters restrict the events, each counted once.
+        """
+        response = self.client.get(
+            "/api/events/attribute-distribution/redshift", {"sub_type": self.ia.pk}
+        )
+        self.assertEqual(response.data["count"], 2)  # type: ignore
+        self.assertAlmostEqual(response.data["mean"], 0.3)  # type: ignore
+
+        response = self.client.get(
+            "/api/events/attribute-distribution/redshift", {"galaxy": self.galaxy.pk}
+        )
+        self.assertAlmostEqual(response.data["max"], 0.3)  # type: ignore
+
+        response = self.client.get("/api/events/attribute-distribution/velocity")
+        self.assertEqual(response.data["count"], 0)  # type: ignore
+        self.assertIsNone(response.data["mean"])  # type: ignore
+
+    def test_cached_until_attribute_write(self):
+        """
+        Results are served from cache until an attribute is written.
+        """
+        url = "/api/events/attribute-distribution/lumdist"
+        self.client.get(url)
+        # only the shared generation is read
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        AttributeFactory(name=AttributeName.LUMDIST, value=300.0)
+        self.assertEqual(self.client.get(url).data["count"], 2)  # type: ignore
+
+    def test_invalid_parameters(self):
+        """
+        Unknown attributes are 404 and bad bin counts are 400.
+        """
+        response = self.client.get("/api/events/attribute-distribution/colour")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get("/api/events/attribute-distribution/redshift", {"bins": 1000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttributeDisagreementTest(APITestCase):
+    """Test the per-event attribute spread across sources"""
+
+    def setUp(self):
+        cache.clear()
+        self.wide = EventFactory(name="SN wide")
+        for value in [0.01, 0.03]:
+            AttributeFactory(event=self.wide, name=AttributeName.REDSHIFT, value=value)
+        self.narrow = EventFactory(name="SN narrow")
+        for value in [100.0, 110.0, 90.0]:
+            AttributeFactory(event=self.narrow, name=AttributeName.LUMDIST, value=value)
+        AttributeFactory(event=self.narrow, name=AttributeName.REDSHIFT, value=0.02)  # single value
+
+    def test_group_spreads(self):
+        """
+        Groups are split on event and name, single values and non finite values are dropped.
+        """
+        rows = [
+            (1, "lumdist", 90.0),
+            (1, "lumdist", 110.0),
+            (1, "redshift", 0.1),
+            (2, "lumdist", float("nan")),
+            (2, "lumdist", 5.0),
+            (3, "maxabsmag", 1.0),
+            (3, "maxabsmag", -1.0),
+        ]
+        self.assertEqual(
+            group_spreads(rows),
+            [(1, "lumdist", 2, 90.0, 110.0, 0.1), (3, "maxabsmag", 2, -1.0, 1.0, None)],
+        )
+
+    def test_maintained_on_attribute_writes(self):
+        """
+        Adding, moving and deleting attributes keeps the spread rows exact.
+        """
+        spread = AttributeSpread.objects.get(event=self.narrow, name=AttributeName.LUMDIST)
+        self.assertEqual((spread.value_count, spread.min_value, spread.max_value), (3, 90.0, 110.0))
+        self.assertFalse(AttributeSpread.objects.filter(name=AttributeName.REDSHIFT, event=self.narrow).exists())
+
+        extra = AttributeFactory(event=self.narrow, name=AttributeName.REDSHIFT, value=0.04)
+        self.assertTrue(AttributeSpread.objects.filter(name=AttributeName.REDSHIFT, event=self.narrow).exists())
+
+        extra.event = self.wide
+        extra.save()
+        self.assertFalse(AttributeSpread.objects.filter(name=AttributeName.REDSHIFT, event=self.narrow).exists())
+        self.assertEqual(AttributeSpread.objects.get(event=self.wide).value_count, 3)
+
+        Attribute.objects.filter(event=self.wide).first().delete()  # type: ignore
+        self.assertEqual(AttributeSpread.objects.get(event=self.wide).value_count, 2)
+        self.assertEqual(find_mismatches(), [])
+
+        self.wide.delete()
+        self.assertFalse(AttributeSpread.objects.filter(event_id=self.wide.pk).exists())
+
+    def test_ranking(self):
+        """
+        The endpoint ranks by relative spread and filters by attribute.
+        """
+        response = self.client.get("/api/events/attribute-disagreement")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data["results"]  # type: ignore
+        self.assertEqual([(r["event__name"], r["name"]) for r in rows], [("SN wide", "redshift"), ("SN narrow", "lumdist")])
+        self.assertAlmostEqual(rows[0]["relative_std"], 0.5)
+
+        response = self.client.get("/api/events/attribute-disagreement", {"attribute": "lumdist"})
+        self.assertEqual([r["event__name"] for r in response.data["results"]], ["SN narrow"])  # type: ignore
+
+        response = self.client.get("/api/events/attribute-disagreement", {"attribute": "colour"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CatalogSnapshotTest(TestCase):
+    """Test the memory-mapped columnar catalog snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings = override_settings(CATALOG_SNAPSHOT_DIR=directory.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+        self.ia = SubTypeFactory()
+        for value in [1.0, 2.0, 4.0]:
+            event = AttributeFactory(name=AttributeName.LUMDIST, value=value, unit="Mpc").event
+            ClaimedTypeFactory(event=event, sub_type=self.ia if value > 1 else SubTypeFactory())
+        AttributeFactory(name=AttributeName.LUMDIST, value=3000.0, unit="kpc")
+        AttributeFactory(name=AttributeName.REDSHIFT, value=0.5)
+
+    def test_columns(self):
+        """
+        Columns are memory-mapped arrays with integer coded names and foreign keys.
+        """
+        self.assertIsNone(snapshot.current())
+        written = snapshot.write_snapshot()
+
+        published = snapshot.current()
+        self.assertEqual(published.path, written.path)  # type: ignore
+        names = published.column("attribute", "name")  # type: ignore
+        self.assertIsInstance(names, np.memmap)
+        self.assertEqual(names.dtype, np.int8)
+        self.assertEqual(published.column("claimed_type", "sub_type").dtype, np.int64)  # type: ignore
+        self.assertEqual(written.manifest["counts"], {"attribute": 5, "claimed_type": 3, "host_galaxy": 0})
+
+    def test_matches_database(self):
+        """
+        Values read from the snapshot match the ones read through the ORM.
+        """
+        from_database = statistics.attribute_values("lumdist", sub_type_id=self.ia.pk)
+        snapshot.write_snapshot()
+        from_snapshot = statistics.attribute_values("lumdist", sub_type_id=self.ia.pk)
+
+        self.assertEqual(sorted(from_snapshot.tolist()), sorted(from_database.tolist()))
+        self.assertEqual(sorted(from_snapshot.tolist()), [2.0, 4.0])
+        self.assertEqual(sorted(snapshot.current().attribute_values("lumdist").tolist()), [1.0, 2.0, 3.0, 4.0])  # type: ignore
+
+    def test_stale_after_write(self):
+        """
+        A write retires the snapshot, which is rebuilt once the interval has passed.
+        """
+        snapshot.write_snapshot()
+        AttributeFactory(name=AttributeName.REDSHIFT, value=0.7)
+        self.assertIsNone(snapshot.current())
+
+        with override_settings(CATALOG_SNAPSHOT_REBUILD_INTERVAL=0):
+            rebuilt = snapshot.current()
+        self.assertEqual(sorted(rebuilt.attribute_values("redshift").tolist()), [0.5, 0.7])  # type: ignore
+        self.assertIs(snapshot.current(), rebuilt)
+
+    def test_stale_after_commit(self):
+        """
+        A rebuild that overlaps a write inside a transaction, built after the row
+        was written but before the commit, is retired again by the commit.
+        """
+        snapshot.write_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                AttributeFactory(name=AttributeName.REDSHIFT, value=0.7)
+                overlapping = snapshot.write_snapshot()
+                self.assertFalse(snapshot.is_stale(overlapping.manifest))
+        self.assertTrue(snapshot.is_stale(overlapping.manifest))
+        self.assertIsNone(snapshot.current(rebuild=False))
+
+    def test_reads_do_not_wait_for_rebuild(self):
+        """
+        A read finding a rebuild running falls back to the database, and reads never
+        rebuild without an interval.
+        """
+        snapshot.write_snapshot()
+        AttributeFactory(name=AttributeName.REDSHIFT, value=0.7)
+
+        with override_settings(CATALOG_SNAPSHOT_REBUILD_INTERVAL=0):
+            with snapshot.rebuild_lock(snapshot.snapshot_directory()):
+                self.assertIsNone(snapshot.current())
+        with override_settings(CATALOG_SNAPSHOT_REBUILD_INTERVAL=None):
+            self.assertIsNone(snapshot.current())
+
+        snapshot.write_snapshot()
+        self.assertIsNotNone(snapshot.current())
+
+    def test_old_snapshots_removed(self):
+        """
+        A rebuild keeps the previous snapshot for readers that still hold it, and
+        leaves directories another process is building alone.
+        """
+        directory = snapshot.snapshot_directory()
+        first = snapshot.write_snapshot().path
+        building = tempfile.mkdtemp(prefix=snapshot.BUILDING_PREFIX, dir=directory)
+        second = snapshot.write_snapshot().path
+        third = snapshot.write_snapshot().path
+
+        self.assertFalse(first.exists())
+        self.assertTrue(second.exists())
+        self.assertTrue(third.exists())
+        self.assertTrue(os.path.exists(building))
+
+    def test_rebuilds_serialized(self):
+        """
+        A rebuild waits for the lock held by a rebuild in another process.
+        """
+        directory = snapshot.snapshot_directory()
+        log = directory / "order"
+
+        def rebuild():
+            # the forked copy of the thread lock is held, as it was at the fork
+            snapshot._rebuild_lock = threading.Lock()
+            with snapshot.rebuild_lock(directory), open(log, "a") as f:
+                f.write("second\n")
+
+        with snapshot.rebuild_lock(directory):
+            process = multiprocessing.get_context("fork").Process(target=rebuild, daemon=True)
+            process.start()
+            process.join(timeout=0.2)
+            with open(log, "a") as f:
+                f.write("first\n")
+        process.join(timeout=5)
+
+        order = log.read_text().split()
+        self.assertEqual(order, ["first", "second"])
+
+
+class SyntheticCatalog(io.TextIOBase):
+    """
+    A supernova.json stream generated as it is read, each event padded with an
+    unused photometry string so a large file never exists on disk or in memory.
+    """
+
+    source = {"name": "Synthetic survey", "url": "https://example.org", "alias": "1"}
+
+    def __init__(self, count, padding):
+        self.events = self._generate(count, "x" * padding)
+        self.pending = ""
+
+    def _generate(self, count, padding):
+        yield "["
+        for i in range(count):
+            event = {
+                "name": f"SN{i:08d}",
+                "sources": [self.source],
+                "hostgalaxy": [{"name": "NGC synthetic", "source": "1"}],
+                "subtype": [{"name": "Ia", "source": "1"}],
+                "attributes": [{"name": "redshift", "value": i / 1000, "unit": None, "source": "1"}],
+            }
+            yield ("," if i else "") + json.dumps(event)[:-1] + f', "photometry": "{padding}"}}'
+        yield "]"
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.pending) < size:
+            chunk = next(self.events, None)
+            if chunk is None:
+                break
+            self.pending += chunk
+        if size < 0:
+            size = len(self.pending)
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+
+class JSONStreamTest(TestCase):
+    """Test incremental parsing of top-level JSON arrays and objects"""
+
+    def parse(self, text, chunk_size):
+        return list(iter_json_items(io.StringIO(text), chunk_size=chunk_size))
+
+    def test_matches_json_loads(self):
+        """
+        Every element comes back as json.loads would parse it, at any chunk size.
+        """
+        document = [{"name": "SN1", "values": [1.5, -2e-3, None]}, 12345, "a \"quoted\", string", [], {}, True]
+        text = json.dumps(document, indent=2)
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 20):
+            self.assertEqual(self.parse(text, chunk_size), document)
+
+        members = {"SN1": {"redshift": 0.1}, "SN2": 42}
+        for chunk_size in (1, 5, 1 << 20):
+            self.assertEqual(self.parse(json.dumps(members), chunk_size), list(members.items()))
+
+        self.assertEqual(self.parse(" [ ] ", 1), [])
+        self.assertEqual(self.parse("{}", 1), [])
+
+    def test_numbers_across_chunks(self):
+        """
+        A number split by a chunk boundary is not cut short.
+        """
+        self.assertEqual(self.parse("[123456789,987654321]", 4), [123456789, 987654321])
+        self.assertEqual(self.parse("[1e10]", 3), [1e10])
+
+    def test_malformed(self):
+        for text in ["", "42", "[1,", "[1 2]", '[{"a": 1]', "[1] [2]", '{"a" 1}', "{1: 2}"]:
+            with self.subTest(text=text), self.assertRaises(json.JSONDecodeError):
+                self.parse(text, 2)
+
+    def test_lazy(self):
+        """
+        Elements are yielded before the rest of the stream is read.
+        """
+        stream = SyntheticCatalog(count=1000, padding=10)
+        first = next(iter_json_items(stream, chunk_size=256))
+        self.assertEqual(first["name"], "SN00000000")
+        self.assertIsNotNone(next(stream.events, None))
+
+
+class StreamingImportTest(TestCase):
+    """Test the bulk importer on streamed supernova.json input"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        lookups = {
+            "galaxies.json": [{"name": "NGC synthetic"}],
+            "subtypes.json": [{"name": "Ia"}],
+            "sources.json": [SyntheticCatalog.source],
+        }
+        for filename, rows in lookups.items():
+            with open(f"{self.directory}/{filename}", "w") as f:
+                json.dump(rows, f)
+
+    def import_catalog(self, count, padding, workers=1):
+        # the script sets Django up on import, which is a no-op once it is running
+        from scripts import bulk_import
+
+        counts = defaultdict(Counter)
+        batches = bulk_import.event_batches(iter_json_items(SyntheticCatalog(count, padding)))
+        with suspended():
+            bulk_import.import_all(batches, counts, self.directory, workers)
+        return counts
+
+    def test_import(self):
+        counts = self.import_catalog(count=1200, padding=1000)
+
+        self.assertEqual(counts["events"]["added"], 1200)
+        self.assertEqual(Event.objects.count(), 1200)
+        self.assertEqual(Attribute.objects.count(), 1200)
+        self.assertEqual(HostGalaxy.objects.count(), 1200)
+        self.assertEqual(ClaimedType.objects.count(), 1200)
+        self.assertEqual(Attribute.objects.get(event__name="SN00000500").value, 0.5)
+
+    def test_parallel_import(self):
+        """
+        Events resolved in a pool of parse workers are written in input order.
+        """
+        counts = self.import_catalog(count=1200, padding=10, workers=2)
+
+        self.assertEqual(counts["attributes"]["added"], 1200)
+        self.assertEqual(
+            list(Event.objects.order_by("id").values_list("name", flat=True)),
+            [f"SN{i:08d}" for i in range(1200)],
+        )
+        self.assertEqual(Attribute.objects.get(event__name="SN00001100").value, 1.1)
+
+    def test_workers_argument(self):
+        """
+        --workers below 1 is a usage error instead of a process pool traceback.
+        """
+        from scripts import bulk_import
+
+        for value in ["0", "-2", "x"]:
+            with (
+                mock.patch("sys.argv", ["bulk_import.py", "--workers", value]),
+                contextlib.redirect_stderr(io.StringIO()) as stderr,
+                self.assertRaises(SystemExit) as exit,
+            ):
+                bulk_import.main()
+            self.assertEqual(exit.exception.code, 2)
+            self.assertIn("--workers", stderr.getvalue())
+        self.assertEqual(bulk_import.worker_count("1"), 1)
+
+    def test_json_lines_preferred(self):
+        """
+        The JSON lines written by extract_data.py take precedence over a JSON array file.
+        """
+        from scripts import bulk_import
+
+        with open(f"{self.directory}/galaxies.jsonl", "w") as f:
+            f.write('{"name":"NGC 1"}\n\n{"name":"NGC 2"}\n')
+        self.assertEqual([row["name"] for row in bulk_import.load("galaxies", self.directory)], ["NGC 1", "NGC 2"])
+        self.assertEqual([row["name"] for row in bulk_import.load("subtypes", self.directory)], ["Ia"])
+
+    @tag("slow")
+    def test_import_multi_gigabyte_file(self):
+        """
+        Peak RSS grows by far less than the size of a 2 GiB input. Run with
+        `uv run manage.py test --tag slow`.
+        """
+        count, padding = 2048, 1 << 20
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        counts = self.import_catalog(count, padding)
+        growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024
+
+        self.assertEqual(counts["events"]["added"], count)
+        self.assertLess(growth, 256 << 20)
+        print(f"\nImported {count * padding >> 30} GiB, peak RSS grew {growth >> 20} MiB")
+
+
+class IncrementalImportTest(TestCase):
+    """Test the incremental mode of the bulk importer against a drifted catalog"""
+
+    sources = [
+        {"name": "Survey A", "url": "https://a.org", "bibcode": None},
+        {"name": "Survey B", "url": "https://b.org", "doi": "10.1/b"},
+    ]
+    supernovae = [
+        {
+            "name": "SN1",
+            "sources": [{**sources[0], "alias": "1"}, {**sources[1], "alias": "2"}],
+            "attributes": [
+                {"name": "redshift", "value": 0.1, "unit": None, "source": "1,2"},
+                {"name": "lumdist", "value": 10.0, "unit": "Mpc", "source": "1"},
+            ],
+            "hostgalaxy": [{"name": "NGC 1", "source": "1"}],
+            "subtype": [{"name": "Ia", "source": "1,2"}],
+        },
+        {
+            "name": "SN2",
+            "sources": [{**sources[0], "alias": "1"}],
+            "attributes": [{"name": "redshift", "value": 0.2, "unit": None, "source": "1"}],
+            "hostgalaxy": [],
+            "subtype": [{"name": "II", "source": "1"}],
+        },
+        {
+            "name": "SN3",
+            "sources": [{**sources[1], "alias": "1"}],
+            "attributes": [],
+            "hostgalaxy": [{"name": "NGC 2", "source": "1"}],
+            "subtype": [],
+        },
+    ]
+
+    def setUp(self):
+        from scripts import bulk_import
+
+        self.bulk_import = bulk_import
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.write_data(self.sources)
+        self.bulk_import.run(directory=self.directory)
+
+    def write_data(self, sources):
+        data = {
+            "galaxies.json": [{"name": "NGC 1"}, {"name": "NGC 2"}],
+            "subtypes.json": [{"name": "Ia"}, {"name": "II"}],
+            "sources.json": sources,
+            "supernova.json": self.supernovae,
+        }
+        for filename, rows in data.items():
+            with open(f"{self.directory}/{filename}", "w") as f:
+                json.dump(rows, f)
+
+    def catalog(self):
+        # sorted lists rather than sets, so repeated rows are compared too
+        return {
+            "events": sorted(Event.objects.values_list("name", flat=True)),
+            "galaxies": sorted(Galaxy.objects.values_list("name", flat=True)),
+            "attributes": sorted(
+                Attribute.objects.values_list("event__name", "name", "source__name", "value", "unit")
+            ),
+            "host galaxies": sorted(
+                HostGalaxy.objects.values_list("event__name", "galaxy__name", "source__name")
+            ),
+            "claimed types": sorted(
+                ClaimedType.objects.values_list("event__name", "sub_type__name", "source__name")
+            ),
+        }
+
+    def test_unchanged_catalog_writes_nothing(self):
+        counts = self.bulk_import.run(incremental=True, directory=self.directory)
+
+        self.assertEqual(self.bulk_import.rows_written(counts), 0)
+        self.assertEqual(find_mismatches(), [])
+
+    def test_unknown_unit_kept(self):
+        """
+        Attributes in a unit without a conversion are imported without a normalized
+        value and counted, also when resolved in worker processes.
+        """
+        velocity = {"name": "velocity", "value": 3.0, "unit": "furlong/fortnight", "source": "1"}
+        sn1 = self.supernovae[0]
+        self.supernovae = [{**sn1, "attributes": [*sn1["attributes"], velocity]}, *self.supernovae[1:]]
+        self.write_data(self.sources)
+
+        counts = self.bulk_import.run(directory=self.directory, workers=2)
+
+        self.assertEqual(counts["attributes"]["unknown unit"], 1)
+        self.assertIsNone(Attribute.objects.get(name="velocity").normalized_value)
+        counts = self.bulk_import.run(incremental=True, directory=self.directory)
+        self.assertEqual(self.bulk_import.rows_written(counts), 0)
+        self.assertEqual(find_mismatches(), [])
+
+    def test_repeated_values(self):
+        """
+        Several values of an attribute from the same source are all kept by an
+        incremental run, and an edit to one of them is a single change.
+        """
+        sn2 = self.supernovae[1]
+        self.supernovae = [
+            self.supernovae[0],
+            {
+                **sn2,
+                "attributes": [
+                    *sn2["attributes"],
+                    {"name": "redshift", "value": 0.21, "unit": None, "source": "1"},
+                    {"name": "redshift", "value": 0.2, "unit": None, "source": "1"},
+                ],
+            },
+            self.supernovae[2],
+        ]
+        self.write_data(self.sources)
+        self.bulk_import.run(directory=self.directory)
+        expected = self.catalog()
+        self.assertEqual(Attribute.objects.filter(event__name="SN2").count(), 3)
+
+        counts = self.bulk_import.run(incremental=True, directory=self.directory)
+        self.assertEqual(self.bulk_import.rows_written(counts), 0)
+
+        Attribute.objects.filter(event__name="SN2", value=0.21).update(value=0.5, normalized_value=0.5)
+        counts = self.bulk_import.run(incremental=True, directory=self.directory)
+        self.assertEqual({table: dict(+count) for table, count in counts.items() if +count}, {"attributes": {"changed": 1}})
+        self.assertEqual(self.catalog(), expected)
+        self.assertEqual(find_mismatches(), [])
+
+    def test_drift_reverted(self):
+        """
+        Edited, deleted and extra rows of every table are brought back to the files.
+        """
+        expected = self.catalog()
+        survey_a, survey_b = Source.objects.get(name="Survey A"), Source.objects.get(name="Survey B")
+        sn1, sn2 = Event.objects.get(name="SN1"), Event.objects.get(name="SN2")
+
+        Attribute.objects.filter(event=sn1, name="lumdist").update(value=99.0, normalized_value=99.0)
+        Attribute.objects.filter(event=sn2).delete()
+        AttributeFactory(event=sn1, name=AttributeName.VELOCITY, value=5.0, source=survey_b)
+        ClaimedType.objects.filter(event=sn1, source=survey_a).delete()
+        HostGalaxyFactory(event=sn2, galaxy=Galaxy.objects.get(name="NGC 2"), source=survey_a)
+        Event.objects.filter(name="SN3").delete()
+        AttributeFactory(event=EventFactory(name="SN extra"), source=survey_a)
+        GalaxyFactory(name="NGC extra")
+
+        counts = self.bulk_import.run(incremental=True, directory=self.directory)
+
+        self.assertEqual(self.catalog(), expected)
+        self.assertEqual(
+            {table: dict(+count) for table, count in counts.items() if +count},
+            {
+                "attributes": {"added": 1, "changed": 1, "removed": 2},
+                "host galaxies": {"added": 1, "removed": 1},
+                "claimed types": {"added": 1},
+                "events": {"added": 1, "removed": 1},
+                "galaxies": {"removed": 1},
+            },
+        )
+        self.assertEqual(find_mismatches(), [])
+
+    def test_changed_source_drops_documents(self):
+        """
+        A changed source drops the stored documents of the events citing it.
+        """
+        for name in ["SN1", "SN2", "SN3"]:
+            get_document(name=name)
+
+        self.write_data([self.sources[0], {**self.sources[1], "doi": "10.2/b"}])
+        counts = self.bulk_import.run(incremental=True, directory=self.directory)
+
+        self.assertEqual(dict(+counts["sources"]), {"changed": 1})
+        self.assertEqual(
+            list(EventDocument.objects.values_list("event__name", flat=True)), ["SN2"]
+        )
+        self.assertEqual(get_document(name="SN1")["SN1"]["sources"][1]["doi"], "10.2/b")
+        self.assertEqual(find_mismatches(), [])
+
+
+class Rows(list):
+    """In-memory stand-in for an extract_data output"""
+
+    write = list.append
+
+
+class ExtractDataTest(SimpleTestCase):
+    """Test parallel extraction of the data files from an OSC dump"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for i in range(40):
+            sources = [
+                {"name": f"Survey {j}", "url": f"https://survey{j}.org", "alias": str(alias)}
+                for alias, j in enumerate({i % 7, i % 5 + 10}, start=1)
+            ]
+            supernova = {
+                "sources": sources,
+                "claimedtype": [{"value": ["Ia", "II", "Ic"][i % 3], "source": "1"}],
+                "host": [{"value": f"NGC {i % 4}", "source": "2"}],
+                "redshift": [{"value": str(i / 100), "source": "1,2"}],
+                "lumdist": [{"value": "n/a", "u_value": "Mpc", "source": "1"}],
+            }
+            with open(f"{directory.name}/SN{i:04d}.json", "w") as f:
+                json.dump({f"SN{i:04d}": supernova}, f)
+
+        from scripts import extract_data
+
+        self.extract_data = extract_data
+        self.paths = extract_data.list_files(directory.name)
+
+    def extract(self, workers, manifest=None, max_records=None):
+        outputs = {kind: Rows() for kind in ("supernovae", "sources", "hosts", "subtypes")}
+        extraction = self.extract_data.Extraction(outputs, max_records)
+        self.parsed = self.extract_data.extract_all(self.paths, extraction, workers, manifest)
+        return (
+            extraction.total_count,
+            outputs["supernovae"],
+            outputs["sources"],
+            outputs["hosts"],
+            outputs["subtypes"],
+        )
+
+    def test_parallel_matches_serial(self):
+        """
+        A process pool merges to exactly what a serial run produces, in the same order.
+        """
+        serial = self.extract(workers=1)
+        self.assertEqual(self.extract(workers=3), serial)
+
+        total, supernovae, sources, hosts, subtypes = serial
+        self.assertEqual([sn["name"] for sn in supernovae], [f"SN{i:04d}" for i in range(40)])
+        self.assertEqual(len(sources), 12)
+        self.assertEqual(len(hosts), 4)
+        self.assertEqual([row["name"] for row in subtypes], [sn["subtype"][0]["name"] for sn in supernovae[:3]])
+        self.assertEqual(supernovae[0]["attributes"], [{"name": "redshift", "value": 0.0, "unit": None, "source": "1,2"}])
+
+    def test_max_records(self):
+        """
+        A record limit samples whole files from the head of the dump.
+        """
+        serial = self.extract(workers=1, max_records=50)
+        self.assertEqual(self.extract(workers=3, max_records=50), serial)
+
+        total, supernovae, *_ = serial
+        self.assertLessEqual(total, 50)
+        self.assertEqual([sn["name"] for sn in supernovae], [f"SN{i:04d}" for i in range(len(supernovae))])
+        self.assertGreater(self.extract(workers=1, max_records=total + 10)[0], total)
+
+    def test_json_lines_output(self):
+        directory = os.path.dirname(self.paths[0])
+        writer = self.extract_data.JSONLinesWriter(f"{directory}/out.jsonl")
+        writer.write({"name": "SN1", "values": [1, None]})
+        writer.write({"name": "SN2"})
+        self.assertFalse(os.path.exists(f"{directory}/out.jsonl"))
+        writer.publish()
+
+        with open(f"{directory}/out.jsonl") as f:
+            self.assertEqual(f.read(), '{"name":"SN1","values":[1,null]}\n{"name":"SN2"}\n')
+
+    def test_manifest(self):
+        """
+        Re-runs parse only new and changed files, and merge the rest from the
+        manifest into the same output as a run from scratch.
+        """
+        directory = os.path.dirname(self.paths[0])
+        manifest = self.extract_data.Manifest(f"{directory}/manifest.sqlite3")
+        self.addCleanup(manifest.close)
+        first = self.extract(workers=1, manifest=manifest)
+        self.assertEqual(self.parsed, 40)
+        self.assertEqual(self.extract(workers=2, manifest=manifest), first)
+        self.assertEqual(self.parsed, 0)
+
+        # touched but identical, rewritten, removed and added
+        os.utime(self.paths[0], ns=(0, 0))
+        with open(self.paths[1], "w") as f:
+            json.dump({"SN0001": {"sources": [], "redshift": [{"value": "0.5", "source": "1"}]}}, f)
+        os.remove(self.paths[2])
+        with open(f"{directory}/SN9999.json", "w") as f:
+            json.dump({"SN9999": {"sources": []}}, f)
+        self.paths = self.extract_data.list_files(directory)
+
+        rerun = self.extract(workers=1, manifest=manifest)
+        self.assertEqual(self.parsed, 2)
+        self.assertEqual(rerun, self.extract(workers=1))
+        self.assertEqual(len(manifest.index()), 40)
+
+
+class StatisticsTablesTest(TestCase):
+    """Test incremental maintenance of the statistics summary tables"""
+
+    def assertConsistent(self):
+        self.assertEqual(find_mismatches(), [])
+
+    def test_claim_changes_keep_tables_exact(self):
+        """
+        Every claim insert, update and delete leaves the tables equal to a full recompute.
+        """
+        type_ia, type_ib, type_ii = (SubTypeFactory() for _ in range(3))
+        galaxy1, galaxy2 = GalaxyFactory(), GalaxyFactory()
+        event1, event2 = EventFactory(), EventFactory()
+
+        HostGalaxyFactory(event=event1, galaxy=galaxy1)
+        moved_host = HostGalaxyFactory(event=event2, galaxy=galaxy1)
+        ClaimedTypeFactory(event=event1, sub_type=type_ia)
+        conflicting = ClaimedTypeFactory(event=event1, sub_type=type_ib)
+        ClaimedTypeFactory(event=event2, sub_type=type_ia)
+        self.assertConsistent()
+
+        conflicting.sub_type = type_ii
+        conflicting.save()
+        self.assertConsistent()
+
+        moved_host.galaxy = galaxy2
+        moved_host.save()
+        self.assertConsistent()
+        self.assertEqual(GalaxyStatistics.objects.get(galaxy=galaxy1).event_count, 1)
+
+        conflicting.delete()
+        self.assertConsistent()
+
+        ClaimedTypeFactory(event=event2, sub_type=type_ii)
+        event2.delete()
+        self.assertConsistent()
+        self.assertFalse(GalaxyStatistics.objects.filter(galaxy=galaxy2).exists())
+
+    def test_event_counters_after_bulk_insert(self):
+        """
+        Bulk inserts bypass signals, refresh_event_counters brings the counters on Event back.
+        """
+        event = EventFactory()
+        source = SourceFactory()
+        ClaimedType.objects.bulk_create(
+            [ClaimedType(event=event, sub_type=SubTypeFactory(), source=source) for _ in range(3)]
+        )
+        HostGalaxy.objects.bulk_create([HostGalaxy(event=event, galaxy=GalaxyFactory(), source=source)])
+
+        refresh_event_counters([event.pk])
+
+        event.refresh_from_db()
+        self.assertEqual(
+            (event.distinct_subtypes, event.distinct_hosts, event.total_sources), (3, 1, 4)
+        )
+
+    def test_verify_command_repairs_drift(self):
+        """
+        The verification command reports rows that drifted and repairs them on request.
+        """
+        HostGalaxyFactory()
+        GalaxyStatistics.objects.update(event_count=42)
+
+        with self.assertRaises(CommandError):
+            call_command("verify_statistics", stdout=io.StringIO())
+
+        call_command("verify_statistics", "--repair", stdout=io.StringIO())
+        self.assertConsistent()
+
+
+class StatisticsCacheTest(TransactionTestCase):
+    """
+    Test the generation-versioned statistics cache. Transactional, so the threads
+    below can read the generation row from their own connections.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_results_cached_until_catalog_write(self):
+        """
+        Repeated reads are served from cache, a claim write retires the cached result.
+        """
+        galaxy = GalaxyFactory(name="NGC cached")
+        HostGalaxyFactory(galaxy=galaxy)
+        self.assertEqual(statistics.galaxy_supernova_counts()[:5][0]["supernova_count"], 1)
+
+        # only the shared generation is read
+        with self.assertNumQueries(1):
+            statistics.galaxy_supernova_counts()[:5]
+
+        HostGalaxyFactory(galaxy=galaxy)
+        self.assertEqual(statistics.galaxy_supernova_counts()[:5][0]["supernova_count"], 2)
+
+    def test_bump_from_another_process(self):
+        """
+        A write made with a different cache, as in another worker or bulk_import,
+        still retires the results cached here.
+        """
+        galaxy = GalaxyFactory(name="NGC shared")
+        HostGalaxyFactory(galaxy=galaxy)
+        self.assertEqual(statistics.galaxy_supernova_counts()[:5][0]["supernova_count"], 1)
+
+        other_process = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "other"}
+        }
+        with override_settings(CACHES=other_process):
+            HostGalaxyFactory(galaxy=galaxy)
+            refresh_event_counters()
+        self.assertEqual(statistics.galaxy_supernova_counts()[:5][0]["supernova_count"], 2)
+
+    def test_concurrent_misses_compute_once(self):
+        """
+        Threads missing the same key at the same time share a single computation.
+        """
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "result"
+
+        statistics.generation()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(statistics.cached("slow", {"a": 1}, compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["result"] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_async_misses_in_separate_loops(self):
+        """
+        Async misses of one key from different event loops, as async views served
+        under WSGI, all complete.
+        """
+        statistics.generation()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(asyncio.run(statistics.acached("slow", {"a": 2}, compute))),
+                # a deadlocked loop fails the test instead of hanging the run
+                daemon=True,
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(results, ["result"] * 4)
+
+
 class SupernovaUncertaintyAPITest(APITestCase):
     """Test supernova uncertainty endpoint"""
 
@@ -216,8 +1804,8 @@ class SupernovaUncertaintyAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Find our events in response
-        event1_data = next((e for e in response.data if e["name"] == "SN2024X"), None)  # type: ignore
-        event2_data = next((e for e in response.data if e["name"] == "SN2024Y"), None)  # type: ignore
+        event1_data = next((e for e in response.data["results"] if e["name"] == "SN2024X"), None)  # type: ignore
+        event2_data = next((e for e in response.data["results"] if e["name"] == "SN2024Y"), None)  # type: ignore
 
         self.assertIsNotNone(event1_data)
         self.assertIsNotNone(event2_data)
@@ -283,7 +1871,7 @@ class SubtypeConflictAPITest(APITestCase):
         response = self.client.get("/api/events/subtype-uncertainty")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        subtype_map = {item["sub_type__name"]: item["conflicted_event_count"] for item in response.data}  # type: ignore
+        subtype_map = {item["sub_type__name"]: item["conflicted_event_count"] for item in response.data["results"]}  # type: ignore
 
         # Type Ia appears in 2 conflicted events (event1, event2)
         self.assertEqual(subtype_map.get("Ia"), 2)
@@ -299,5 +1887,5 @@ class SubtypeConflictAPITest(APITestCase):
 
         # Verify event3 and event4 are NOT included
         all_conflicted_events = set()
-        for item in response.data:  # type: ignore
+        for item in response.data["results"]:  # type: ignore
             all_conflicted_events.add(item["conflicted_event_count"])
@@ -0,0 +1,59 @@
+"""
+Conversion of attribute values to one canonical unit per attribute name.
+
+Attribute.unit is whatever the source reported. The value converted to the
+canonical unit is stored next to it in Attribute.normalized_value, so filters,
+statistics and sorting can compare values across sources in SQL.
+
+Validated writes reject units without a conversion. Data loaded without
+validation (migrations, bulk_import) keeps such rows with a NULL
+normalized_value instead, which leaves them out of filters and statistics.
+"""
+
+from .models import AttributeName
+
+
+class UnitError(ValueError):
+    pass
+
+
+# canonical unit of every attribute, an empty unit means the canonical one
+CANONICAL_UNITS = {
+    AttributeName.LUMDIST: "Mpc",
+    AttributeName.VELOCITY: "km/s",
+    AttributeName.REDSHIFT: "",
+    AttributeName.MAX_ABS_MAG: "mag",
+    AttributeName.MAX_APP_MAG: "mag",
+}
+
+# multiply a value in the (lowercase) unit by the factor to get the canonical unit
+CONVERSIONS = {
+    AttributeName.LUMDIST: {"mpc": 1.0, "kpc": 1e-3, "pc": 1e-6, "gpc": 1e3},
+    AttributeName.VELOCITY: {"km/s": 1.0, "m/s": 1e-3, "cm/s": 1e-5},
+    AttributeName.REDSHIFT: {},
+    AttributeName.MAX_ABS_MAG: {"mag": 1.0},
+    AttributeName.MAX_APP_MAG: {"mag": 1.0},
+}
+
+
+def conversion_factor(name, unit):
+    unit = (unit or "").strip().lower()
+    if not unit:
+        return 1.0
+    try:
+        return CONVERSIONS[name][unit]
+    except KeyError:
+        raise UnitError(f"Unknown unit {unit!r} for {name}.")
+
+
+def normalize(name, value, unit):
+    """value in unit, converted to the canonical unit of the attribute"""
+    return value * conversion_factor(name, unit)
+
+
+def normalize_or_none(name, value, unit):
+    """normalize(), or None for a unit without a conversion"""
+    try:
+        return normalize(name, value, unit)
+    except UnitError:
+        return None
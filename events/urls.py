@@ -4,6 +4,10 @@ from django.urls import path, include
 
 from .views import (
     EventViewSet,
+    attribute_disagreement,
+    attribute_distribution,
+    autocomplete_events,
+    export_events,
     galaxy_by_supernova_diversity,
     galaxy_by_supernova_count,
     subtype_with_conflicting_sn,
@@ -17,10 +21,18 @@ router.register(r"", EventViewSet, basename="events")
 
 urlpatterns = [
     *router.urls,
+    path("export", export_events, name="export"),
+    path("autocomplete", autocomplete_events, name="autocomplete"),
     path(
         "galaxy-sn-diversity", galaxy_by_supernova_diversity, name="supernova_diversity"
     ),
     path("galaxy-sn-count", galaxy_by_supernova_count, name="supernova_count"),
     path("supernova-uncertainty", supernova_uncertainty, name="supernova_uncertainty"),
     path("subtype-uncertainty", subtype_with_conflicting_sn, name="subtype_uncertainty"),
+    path("attribute-disagreement", attribute_disagreement, name="attribute_disagreement"),
+    path(
+        "attribute-distribution/<str:name>",
+        attribute_distribution,
+        name="attribute_distribution",
+    ),
 ]
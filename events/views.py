@@ -1,15 +1,34 @@
+import base64
+import binascii
+import json
+import math
+from functools import partial
+
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.decorators import api_view
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+    replace_query_param,
+)
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
 
-from django.db.models import Count, F
-from django.shortcuts import get_object_or_404
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from . import models, serializers
+from . import documents, models, serializers, statistics, units
+
+
+EXPORT_CHUNK_SIZE = 500
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+MAX_DISTRIBUTION_BINS = 200
+ATTRIBUTE_LOOKUPS = ("gt", "gte", "lt", "lte")
 
 
 class EventPagination(PageNumberPagination):
@@ -18,10 +37,181 @@ class EventPagination(PageNumberPagination):
     max_page_size = 50
 
 
+def cursor_value_valid(model, path, value):
+    """Whether value can be compared with the model field at path, e.g. galaxy__name"""
+    *relations, name = path.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    if field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type.endswith(("IntegerField", "AutoField", "FloatField")) and type(value) is int:
+        # bool is an int, and SQLite integers are 64 bits
+        return -(2**63) <= value < 2**63
+    if internal_type == "FloatField":
+        return type(value) is float and math.isfinite(value)
+    return internal_type in ("CharField", "TextField") and isinstance(value, str)
+
+
+class StatisticsPagination(BasePagination):
+    """
+    Keyset pagination of a statistics ranking. The cursor carries the (metric,
+    key) pair of the last row, so the next page is a range scan continuing from
+    it, and only `limit + 1` rows are ever read. Pages are cached per parameter
+    set through the statistics service.
+
+    `orderings` maps the public ordering names to (database field, row key).
+    `key` is the (database field, row key) of a unique tiebreaker.
+    """
+
+    default_limit = 50
+    max_limit = 500
+
+    def __init__(self, orderings, default_ordering, key):
+        self.orderings = orderings
+        self.default_ordering = default_ordering
+        self.key = key
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get("ordering", self.default_ordering)
+        if ordering.lstrip("-") not in self.orderings:
+            raise ValidationError(
+                {"ordering": f"Must be one of {', '.join(sorted(self.orderings))}, optionally prefixed with '-'."}
+            )
+        return ordering
+
+    def order(self, queryset, ordering):
+        field, _ = self.orderings[ordering.lstrip("-")]
+        direction = "-" if ordering.startswith("-") else ""
+        return queryset.order_by(f"{direction}{field}", f"{direction}{self.key[0]}")
+
+    def prepare(self, ranking, request):
+        """Ordered, cursor-filtered query of the page and its cache parameters"""
+        self.request = request
+        self.limit = positive_int_param(request, "limit") or self.default_limit
+        self.limit = min(self.limit, self.max_limit)
+        self.ordering = self.get_ordering(request)
+        cursor = request.query_params.get("cursor")
+
+        queryset = self.order(ranking.queryset, self.ordering)
+        if cursor:
+            position = self.decode_cursor(cursor, ranking.queryset.model)
+            queryset = queryset.filter(self.after(self.ordering, position))
+
+        params = {**ranking.params, "ordering": self.ordering, "cursor": cursor, "limit": self.limit}
+        return queryset[: self.limit + 1], params
+
+    def paginate_queryset(self, ranking, request, view=None):
+        queryset, params = self.prepare(ranking, request)
+        rows = statistics.cached(f"{ranking.name}:page", params, lambda: list(queryset))
+        return self.trim(rows)
+
+    async def apaginate_queryset(self, ranking, request):
+        queryset, params = self.prepare(ranking, request)
+        rows = await statistics.acached(
+            f"{ranking.name}:page", params, lambda: statistics.alist(queryset)
+        )
+        return self.trim(rows)
+
+    def trim(self, rows):
+        # the extra row only tells whether there is a next page
+        self.next_position = None
+        if len(rows) > self.limit:
+            rows = rows[: self.limit]
+            _, row_key = self.orderings[self.ordering.lstrip("-")]
+            self.next_position = [rows[-1][row_key], rows[-1][self.key[1]]]
+        return rows
+
+    def after(self, ordering, position):
+        field, _ = self.orderings[ordering.lstrip("-")]
+        value, key = position
+        op = "lt" if ordering.startswith("-") else "gt"
+        return Q(**{f"{field}__{op}": value}) | Q(
+            **{field: value, f"{self.key[0]}__{op}": key}
+        )
+
+    def decode_cursor(self, cursor, model):
+        """
+        (metric, key) position of the cursor, whose values must suit the fields of
+        the current ordering: a cursor kept across a change of ordering is rejected.
+        """
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise ValidationError({"cursor": "Invalid cursor."})
+        if not isinstance(position, list) or len(position) != 2:
+            raise ValidationError({"cursor": "Invalid cursor."})
+        field, _ = self.orderings[self.ordering.lstrip("-")]
+        for path, value in zip([field, self.key[0]], position):
+            if not cursor_value_valid(model, path, value):
+                raise ValidationError({"cursor": "Invalid cursor for this ordering."})
+        return position
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        cursor = base64.urlsafe_b64encode(json.dumps(self.next_position).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), "cursor", cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+class EventCursorPagination(CursorPagination):
+    """
+    Keyset pagination over an indexed column: every page is a constant cost
+    range scan and iteration is stable while rows are being inserted.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = "id"
+    ordering_fields = ("id", "-id", "name", "-name")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get("ordering", self.ordering)
+        if ordering not in self.ordering_fields:
+            ordering = self.ordering
+        return (ordering,)
+
+
+def attribute_ranges(request):
+    """Parse `<attribute>__<lookup>=<number>` query parameters by attribute name"""
+    ranges = {}
+    for param, value in request.query_params.items():
+        name, _, lookup = param.partition("__")
+        if name not in models.AttributeName.values:
+            continue
+        if lookup not in ATTRIBUTE_LOOKUPS:
+            raise ValidationError({param: f"Lookup must be one of {', '.join(ATTRIBUTE_LOOKUPS)}."})
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValidationError({param: "Must be a number."})
+        if not math.isfinite(value):
+            raise ValidationError({param: "Must be a finite number."})
+        ranges.setdefault(name, {})[lookup] = value
+    return ranges
+
+
 class EventViewSet(ViewSet):
     pagination_class = EventPagination
+    cursor_pagination_class = EventCursorPagination
+
+    def get_paginator(self, request):
+        params = request.query_params
+        if "cursor" in params or params.get("pagination") == "cursor":
+            return self.cursor_pagination_class()
+        return self.pagination_class()
 
     @swagger_auto_schema(
+        operation_description=(
+            "Events may be filtered by attribute ranges as `<attribute>__<lookup>=<number>`, "
+            f"lookup one of {', '.join(ATTRIBUTE_LOOKUPS)}, e.g. "
+            "`redshift__gte=0.01&redshift__lte=0.05&maxabsmag__lt=-19`."
+        ),
         manual_parameters=[
             openapi.Parameter(
                 "page",
@@ -35,12 +225,34 @@ class EventViewSet(ViewSet):
                 description="Number of results per page",
                 type=openapi.TYPE_INTEGER,
             ),
+            openapi.Parameter(
+                "pagination",
+                openapi.IN_QUERY,
+                description="Set to `cursor` to page by keyset instead of page number",
+                type=openapi.TYPE_STRING,
+                enum=["page", "cursor"],
+            ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="Cursor from the `next`/`previous` link of a cursor page",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "ordering",
+                openapi.IN_QUERY,
+                description="Cursor ordering",
+                type=openapi.TYPE_STRING,
+                enum=list(EventCursorPagination.ordering_fields),
+            ),
         ]
     )
     def list(self, request):
-        queryset = models.Event.objects.all()
+        queryset = models.Event.objects.with_attribute_ranges(
+            attribute_ranges(request)
+        ).order_by("id")
 
-        paginator = self.pagination_class()
+        paginator = self.get_paginator(request)
         page = paginator.paginate_queryset(queryset, request)
 
         serializer = serializers.EventSerializer(page, many=True)
@@ -50,103 +262,374 @@ class EventViewSet(ViewSet):
         operation_description="Denormalize the events into the original OSC schema"
     )
     def retrieve(self, request, pk=None):
-        event = get_object_or_404(models.Event, pk=pk)
-        serializer = serializers.EventOSCSchemaSerializer(event)
-        return Response(serializer.data)
+        try:
+            document = documents.get_document(event_id=pk)
+        except models.Event.DoesNotExist:
+            raise Http404
+        return Response(document)
+
+    @swagger_auto_schema(
+        request_body=serializers.EventBatchSerializer,
+        operation_description="Retrieve the OSC documents of up to 500 events by id or name",
+    )
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        serializer = serializers.EventBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]  # type: ignore
+        names = serializer.validated_data["names"]  # type: ignore
+
+        rows = models.Event.objects.filter(Q(pk__in=ids) | Q(name__in=names)).values_list(
+            "id", "name"
+        )
+        id_by_name = {name: pk for pk, name in rows}
+        known_ids = set(id_by_name.values())
+
+        # keep the request order, dropping duplicates
+        requested = {}
+        missing = []
+        for key in [*ids, *names]:
+            event_id = id_by_name.get(key) if isinstance(key, str) else key
+            if event_id in known_ids:
+                requested.setdefault(event_id, None)
+            else:
+                missing.append(key)
+
+        by_id = documents.get_documents(list(requested))
+        return Response(
+            {
+                "results": [by_id[event_id] for event_id in requested],
+                "missing": missing,
+            }
+        )
 
 
 @api_view(["GET"])
-def galaxy_by_supernova_count(request):
-    rows = (
-        models.HostGalaxy.objects.select_related("galaxy", "event")
-        .values("galaxy__id", "galaxy__name", "event__name")
-        .distinct()
+def export_events(request):
+    """
+    Stream the whole catalog as newline delimited OSC documents. Events are read
+    in chunks, each chunk with its own batched prefetch, so memory stays flat.
+    """
+    events = (
+        models.Event.objects.with_osc_relations()
+        .order_by("id")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    lines = (
+        json.dumps(serializers.EventOSCSchemaSerializer(event).data) + "\n"
+        for event in events
     )
 
-    result = {}
-    for r in rows:
-        g = r["galaxy__name"]
-        result.setdefault(g, set()).add(r["event__name"])
+    response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+    response["Content-Disposition"] = 'attachment; filename="supernovae.ndjson"'
+    return response
 
-    data = [
-        {
-            "galaxy": g,
-            "supernova_events": sorted(list(events)),
-        }
-        for g, events in result.items()
-    ]
 
-    return Response(data)
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        openapi.Parameter(
+            "q",
+            openapi.IN_QUERY,
+            description="Case-insensitive event name prefix",
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter(
+            "limit",
+            openapi.IN_QUERY,
+            description=f"Maximum number of names (up to {MAX_AUTOCOMPLETE_LIMIT})",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+)
+@api_view(["GET"])
+def autocomplete_events(request):
+    prefix = request.query_params.get("q", "").strip()
+    limit = autocomplete_limit(request)
+
+    if not prefix:
+        return Response([])
+
+    names = models.Event.objects.with_name_prefix(prefix).values_list("name", flat=True)
+    return Response(list(names[:limit]))
+
+
+def autocomplete_limit(request):
+    """Requested number of suggestions, clamped to 1..MAX_AUTOCOMPLETE_LIMIT, the default when unparseable"""
+    try:
+        limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    return min(max(limit, 1), MAX_AUTOCOMPLETE_LIMIT)
+
+
+def positive_int_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer."})
+    if value < 1:
+        raise ValidationError({name: "Must be a positive integer."})
+    return value
+
+
+def stream_rows(rows, content_type="application/x-ndjson"):
+    lines = (json.dumps(row) + "\n" for row in rows)
+    return StreamingHttpResponse(lines, content_type=content_type)
+
+
+def with_names(rows, loader, build, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Attach the per-galaxy name lists to galaxy ranking rows, loading the names of
+    one chunk of galaxies at a time.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            names = loader([g["galaxy_id"] for g in chunk])
+            yield from (build(g, names) for g in chunk)
+            chunk = []
+    if chunk:
+        names = loader([g["galaxy_id"] for g in chunk])
+        yield from (build(g, names) for g in chunk)
+
+
+STATISTICS_PARAMETERS = [
+    openapi.Parameter(
+        "limit",
+        openapi.IN_QUERY,
+        description=f"Rows per page (default {StatisticsPagination.default_limit}, up to {StatisticsPagination.max_limit})",
+        type=openapi.TYPE_INTEGER,
+    ),
+    openapi.Parameter(
+        "cursor",
+        openapi.IN_QUERY,
+        description="Cursor from the `next` link of the previous page",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "ordering",
+        openapi.IN_QUERY,
+        description="Ranking order, prefix with '-' for descending",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "stream",
+        openapi.IN_QUERY,
+        description="Set to 1 to stream every row as newline delimited JSON instead of paging",
+        type=openapi.TYPE_BOOLEAN,
+    ),
+]
+
+
+def is_streaming(request):
+    return request.query_params.get("stream") in ("1", "true")
+
+
+def paginate_or_stream(request, ranking, pagination, build=None):
+    """Render a statistics ranking as a keyset page, or the whole ranking as NDJSON"""
+    build = build or (lambda rows: rows)
+    if is_streaming(request):
+        ordering = pagination.get_ordering(request)
+        rows = pagination.order(ranking.queryset, ordering).iterator()
+        return stream_rows(build(rows))
+
+    page = pagination.paginate_queryset(ranking, request)
+    return pagination.get_paginated_response(list(build(page)))
+
+
+galaxy_count_pagination = partial(
+    StatisticsPagination,
+    orderings={
+        "supernova_count": ("event_count", "supernova_count"),
+        "galaxy": ("galaxy__name", "galaxy__name"),
+    },
+    default_ordering="-supernova_count",
+    key=("galaxy_id", "galaxy_id"),
+)
+
+galaxy_diversity_pagination = partial(
+    StatisticsPagination,
+    orderings={
+        "supernova_type_count": ("subtype_count", "supernova_type_count"),
+        "galaxy": ("galaxy__name", "galaxy__name"),
+    },
+    default_ordering="-supernova_type_count",
+    key=("galaxy_id", "galaxy_id"),
+)
+
+uncertainty_pagination = partial(
+    StatisticsPagination,
+    orderings={
+        "total_sources": ("total_sources", "total_sources"),
+        "distinct_subtypes": ("distinct_subtypes", "distinct_subtypes"),
+        "distinct_hosts": ("distinct_hosts", "distinct_hosts"),
+        "name": ("name", "name"),
+    },
+    default_ordering="-total_sources",
+    key=("name", "name"),
+)
+
+subtype_conflict_pagination = partial(
+    StatisticsPagination,
+    orderings={
+        "conflicted_event_count": ("conflicted_event_count", "conflicted_event_count"),
+        "sub_type": ("sub_type__name", "sub_type__name"),
+    },
+    default_ordering="-conflicted_event_count",
+    key=("sub_type_id", "sub_type_id"),
+)
+
+
+attribute_disagreement_pagination = partial(
+    StatisticsPagination,
+    orderings={
+        "relative_std": ("relative_std", "relative_std"),
+        "value_count": ("value_count", "value_count"),
+        "event": ("event__name", "event__name"),
+    },
+    default_ordering="-relative_std",
+    key=("id", "id"),
+)
+
 
+def galaxy_count_row(g, events):
+    return {
+        "galaxy": g["galaxy__name"],
+        "supernova_count": g["supernova_count"],
+        "supernova_events": events.get(g["galaxy_id"], []),
+    }
 
+
+def galaxy_diversity_row(g, types):
+    return {
+        "galaxy": g["galaxy__name"],
+        "supernova_types": types.get(g["galaxy_id"], []),
+    }
+
+
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        *STATISTICS_PARAMETERS,
+        openapi.Parameter(
+            "top_n",
+            openapi.IN_QUERY,
+            description=f"Only return the N galaxies hosting the most events, at most {StatisticsPagination.max_limit}",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            "min_count",
+            openapi.IN_QUERY,
+            description="Only galaxies hosting at least this many events",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+)
 @api_view(["GET"])
-def galaxy_by_supernova_diversity(request):
-    rows = (
-        models.HostGalaxy.objects.select_related("galaxy")
-        .values(
-            "galaxy__id",
-            "galaxy__name",
-            "event__claimed_types__sub_type__name",
-        )
-        .exclude(event__claimed_types__sub_type__isnull=True)
-        .distinct()
-    )
+def galaxy_by_supernova_count(request):
+    top_n = positive_int_param(request, "top_n")
+    min_count = positive_int_param(request, "min_count")
 
-    result = {}
-    for r in rows:
-        g = r["galaxy__name"]
-        t = r["event__claimed_types__sub_type__name"]
-        result.setdefault(g, set()).add(t)
+    def build(rows):
+        return with_names(rows, statistics.galaxy_event_names, galaxy_count_row)
 
-    data = [
-        {
-            "galaxy": g,
-            "supernova_types": sorted(list(types)),
-        }
-        for g, types in result.items()
-    ]
+    ranking = statistics.galaxy_supernova_counts(min_count=min_count)
+    if top_n:
+        top_n = min(top_n, StatisticsPagination.max_limit)
+        return Response({"next": None, "results": list(build(ranking[:top_n]))})
 
-    return Response(data)
+    return paginate_or_stream(request, ranking, galaxy_count_pagination(), build)
 
 
+@swagger_auto_schema(method="get", manual_parameters=STATISTICS_PARAMETERS)
 @api_view(["GET"])
-def supernova_uncertainty(request):
-    queryset = (
-        models.Event.objects.annotate(
-            # original counts
-            distinct_subtypes=Count("claimed_types__sub_type", distinct=True),
-            distinct_hosts=Count("host_galaxies__galaxy", distinct=True),
-        )
-        .annotate(
-            total_sources=F("distinct_subtypes") + F("distinct_hosts")
-        )
-        .values(
-            "name",
-            "distinct_subtypes",
-            "distinct_hosts",
-            "total_sources",
-        )
-        .order_by("-total_sources")
-    )
+def galaxy_by_supernova_diversity(request):
+    def build(rows):
+        return with_names(rows, statistics.galaxy_subtype_names, galaxy_diversity_row)
 
-    return Response(queryset)
+    ranking = statistics.galaxy_supernova_diversity()
+    return paginate_or_stream(request, ranking, galaxy_diversity_pagination(), build)
 
 
+@swagger_auto_schema(method="get", manual_parameters=STATISTICS_PARAMETERS)
+@api_view(["GET"])
+def supernova_uncertainty(request):
+    ranking = statistics.supernova_uncertainty()
+    return paginate_or_stream(request, ranking, uncertainty_pagination())
+
+
+@swagger_auto_schema(method="get", manual_parameters=STATISTICS_PARAMETERS)
 @api_view(["GET"])
 def subtype_with_conflicting_sn(request):
-    # find events with multiple subtype claims
-    conflicted_events = (
-        models.ClaimedType.objects.values("event")
-        .annotate(subtype_count=Count("sub_type", distinct=True))
-        .filter(subtype_count__gt=1)
-        .values_list("event", flat=True)
-    )
+    ranking = statistics.subtype_conflicts()
+    return paginate_or_stream(request, ranking, subtype_conflict_pagination())
+
+
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        *STATISTICS_PARAMETERS,
+        openapi.Parameter(
+            "attribute",
+            openapi.IN_QUERY,
+            description="Only rank this attribute",
+            type=openapi.TYPE_STRING,
+            enum=models.AttributeName.values,
+        ),
+    ],
+)
+@api_view(["GET"])
+def attribute_disagreement(request):
+    name = request.query_params.get("attribute") or None
+    if name is not None and name not in models.AttributeName.values:
+        raise ValidationError(
+            {"attribute": f"Must be one of {', '.join(models.AttributeName.values)}."}
+        )
+    ranking = statistics.attribute_disagreement(name)
+    return paginate_or_stream(request, ranking, attribute_disagreement_pagination())
+
+
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        openapi.Parameter(
+            "sub_type",
+            openapi.IN_QUERY,
+            description="Only events claimed as this subtype id",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            "galaxy",
+            openapi.IN_QUERY,
+            description="Only events hosted by this galaxy id",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            "bins",
+            openapi.IN_QUERY,
+            description=f"Number of histogram bins (up to {MAX_DISTRIBUTION_BINS})",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+)
+@api_view(["GET"])
+def attribute_distribution(request, name):
+    if name not in models.AttributeName.values:
+        raise Http404(f"Unknown attribute {name!r}.")
+
+    bins = positive_int_param(request, "bins") or statistics.DISTRIBUTION_BINS
+    if bins > MAX_DISTRIBUTION_BINS:
+        raise ValidationError({"bins": f"Must be at most {MAX_DISTRIBUTION_BINS}."})
 
-    # count how often each subtype appears in conflicted events
-    queryset = (
-        models.ClaimedType.objects.filter(event__in=conflicted_events)
-        .values("sub_type__name")
-        .annotate(conflicted_event_count=Count("event", distinct=True))
-        .order_by("-conflicted_event_count")
+    distribution = statistics.attribute_distribution(
+        name,
+        sub_type_id=positive_int_param(request, "sub_type"),
+        galaxy_id=positive_int_param(request, "galaxy"),
+        bins=bins,
     )
-    return Response(queryset)
+    return Response({"attribute": name, "unit": units.CANONICAL_UNITS[name], **distribution})
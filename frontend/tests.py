@@ -48,6 +48,17 @@ class EventSearchViewTest(TestCase):
         self.assertIn("claimedtype", event_json["SN2024TEST"])
         self.assertIn("hostgalaxy", event_json["SN2024TEST"])
 
+    def test_search_is_case_insensitive(self):
+        """
+        Test that a designation typed in a different case still finds the event
+        """
+        EventFactory(name="AT2021aczc")
+
+        response = self.client.get(self.url, {"name": "at2021ACZC"})
+
+        self.assertIsNone(response.context["error"])
+        self.assertIn("AT2021aczc", response.context["event_json"])
+
     def test_search_nonexistent_event_returns_error(self):
         """
         Test that searching for a non-existent event returns an error message
@@ -85,3 +96,42 @@ class EventCreationViewTest(TestCase):
         # Verify forms are not bound
         self.assertFalse(response.context["event_form"].is_bound)
         self.assertFalse(response.context["attr_formset"].is_bound)
+
+    def post_event(self, unit):
+        source = SourceFactory()
+        data = {"name": "SN2024units"}
+        for prefix in ["attributes", "claimed_types", "host_galaxies"]:
+            data.update({
+                f"{prefix}-TOTAL_FORMS": "1" if prefix == "attributes" else "0",
+                f"{prefix}-INITIAL_FORMS": "0",
+                f"{prefix}-MIN_NUM_FORMS": "0",
+                f"{prefix}-MAX_NUM_FORMS": "1000",
+            })
+        data.update({
+            "attributes-0-name": "lumdist",
+            "attributes-0-source": source.pk,
+            "attributes-0-value": "2500",
+            "attributes-0-unit": unit,
+        })
+        return self.client.post(self.url, data)
+
+    def test_post_normalizes_attribute_units(self):
+        """
+        Test that attribute values are stored converted to the canonical unit
+        """
+        response = self.post_event("kpc")
+
+        self.assertEqual(response.status_code, 302)
+        attribute = Event.objects.get(name="SN2024units").attributes.get()  # type: ignore
+        self.assertEqual((attribute.value, attribute.unit), (2500.0, "kpc"))
+        self.assertAlmostEqual(attribute.normalized_value, 2.5)
+
+    def test_post_rejects_unknown_unit(self):
+        """
+        Test that an attribute in an unknown unit is a form error
+        """
+        response = self.post_event("parsec-ish")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("unit", response.context["attr_formset"].errors[0])
+        self.assertFalse(Event.objects.filter(name="SN2024units").exists())
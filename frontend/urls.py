@@ -7,6 +7,7 @@ from .views import (
     galaxy_sn_diversity,
     event_sn_uncertainty,
     subtype_sn_uncertainty,
+    attribute_disagreement,
     htmlx_formset_row
 )
 
@@ -21,4 +22,5 @@ urlpatterns = [
     path("graphs/galaxy-sn-diversity", galaxy_sn_diversity, name="galaxy_sn_diversity"),
     path("graphs/event-sn-uncertainty", event_sn_uncertainty, name="event_sn_uncertainty"),
     path("graphs/subtype-sn-uncertainty", subtype_sn_uncertainty, name="subtype_sn_uncertainty"),
+    path("graphs/attribute-disagreement", attribute_disagreement, name="attribute_disagreement"),
 ]
@@ -1,9 +1,9 @@
 from django.shortcuts import render, redirect
-from django.db.models import Count, F
 from django.http import HttpResponseBadRequest
 
-from events.models import Event, HostGalaxy, ClaimedType
-from events.serializers import EventOSCSchemaSerializer
+from events import statistics
+from events.models import Event
+from events.documents import aget_document
 from frontend.forms import (
     EventForm,
     AttributeFormSet,
@@ -17,18 +17,25 @@ def home(request):
 
 
 # ===================== Search Event Views ==================
-def search_event(request):
+async def search_event(request):
     name = request.GET.get("name")
     event_json = None
     error = None
 
     if name:
         try:
-            event = Event.objects.get(name=name)
-            serializer = EventOSCSchemaSerializer(event)
-            event_json = serializer.data
+            event_json = await aget_document(name=name)
         except Event.DoesNotExist:
-            error = f'Event with name "{name}" not found.'
+            # fall back to a case-insensitive match on the designation
+            event_id = (
+                await Event.objects.with_name_iexact(name)
+                .values_list("id", flat=True)
+                .afirst()
+            )
+            if event_id is not None:
+                event_json = await aget_document(event_id=event_id)
+            else:
+                error = f'Event with name "{name}" not found.'
 
     context = {
         "query_name": name or "",
@@ -106,17 +113,11 @@ def htmlx_formset_row(request, kind):
 
 
 # ============= Statistical Views ==================
-def galaxy_sn_count(request):
+async def galaxy_sn_count(request):
     top_n = 5
 
-    queryset = (
-        HostGalaxy.objects.values("galaxy__id", "galaxy__name")
-        .annotate(supernova_count=Count("event", distinct=True))
-        .order_by("-supernova_count")[:top_n]
-    )
-
     context = {
-        "results": list(queryset),
+        "results": await statistics.galaxy_supernova_counts().aslice(0, top_n),
         "metric_key": "supernova_count",
         "label_key": "galaxy__name",
         "label": "Supernova Count",
@@ -126,19 +127,11 @@ def galaxy_sn_count(request):
     return render(request, "graphs/sn_bar_chart.html", context)
 
 
-def galaxy_sn_diversity(request):
+async def galaxy_sn_diversity(request):
     top_n = 5
 
-    queryset = (
-        HostGalaxy.objects.values("galaxy__id", "galaxy__name")
-        .annotate(
-            supernova_type_count=Count("event__claimed_types__sub_type", distinct=True)
-        )
-        .order_by("-supernova_type_count")[:top_n]
-    )
-
     context = {
-        "results": list(queryset),
+        "results": await statistics.galaxy_supernova_diversity().aslice(0, top_n),
         "metric_key": "supernova_type_count",
         "label_key": "galaxy__name",
         "label": "Unique SubType count",
@@ -149,32 +142,14 @@ def galaxy_sn_diversity(request):
     return render(request, "graphs/sn_bar_chart.html", context)
 
 
-def event_sn_uncertainty(request):
+async def event_sn_uncertainty(request):
     top_n = int(request.GET.get("limit", 5))
 
-    queryset = (
-        Event.objects.annotate(
-            # original counts
-            distinct_subtypes=Count("claimed_types__sub_type", distinct=True),
-            distinct_hosts=Count("host_galaxies__galaxy", distinct=True),
-        )
-        .annotate(
-            total_sources=F("distinct_subtypes") + F("distinct_hosts")
-        )
-        .values(
-            "name",
-            "distinct_subtypes",
-            "distinct_hosts",
-            "total_sources",
-        )
-        .order_by("-total_sources")[:top_n]
-    )
-
     return render(
         request,
         "graphs/sn_bar_chart.html",
         {
-            "results": list(queryset),
+            "results": await statistics.supernova_uncertainty().aslice(0, top_n),
             "metric_key": "total_sources",
             "label_key": "name",
             "label": "Conflicting source count",
@@ -184,30 +159,14 @@ def event_sn_uncertainty(request):
     )
 
 
-def subtype_sn_uncertainty(request):
+async def subtype_sn_uncertainty(request):
     top_n = int(request.GET.get("limit", 5))
 
-    # find events with multiple subtype claims
-    conflicted_events = (
-        ClaimedType.objects.values("event")
-        .annotate(subtype_count=Count("sub_type", distinct=True))
-        .filter(subtype_count__gt=1)
-        .values_list("event", flat=True)
-    )
-
-    # count how often each subtype appears in conflicted events
-    queryset = (
-        ClaimedType.objects.filter(event__in=conflicted_events)
-        .values("sub_type__name")
-        .annotate(conflicted_event_count=Count("event", distinct=True))
-        .order_by("-conflicted_event_count")[:top_n]
-    )
-
     return render(
         request,
         "graphs/sn_bar_chart.html",
         {
-            "results": list(queryset),
+            "results": await statistics.subtype_conflicts().aslice(0, top_n),
             "metric_key": "conflicted_event_count",
             "label_key": "sub_type__name",
             "label": "Conflicting supernova count",
@@ -215,3 +174,22 @@ def subtype_sn_uncertainty(request):
             "api_url_name": "events:subtype_uncertainty",
         },
     )
+
+
+async def attribute_disagreement(request):
+    top_n = int(request.GET.get("limit", 5))
+    attribute = request.GET.get("attribute") or None
+    rows = await statistics.attribute_disagreement(attribute).aslice(0, top_n)
+
+    return render(
+        request,
+        "graphs/sn_bar_chart.html",
+        {
+            "results": [{**row, "label": f"{row['event__name']} ({row['name']})"} for row in rows],
+            "metric_key": "relative_std",
+            "label_key": "label",
+            "label": "Relative standard deviation across sources",
+            "title": "Supernova Attributes with Highest Source Disagreement",
+            "api_url_name": "events:attribute_disagreement",
+        },
+    )
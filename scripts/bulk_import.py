@@ -1,13 +1,23 @@
 import os
 import sys
 import json
+import time
+import argparse
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import batched
 from pathlib import Path
 import django
-from django.db import connection
+from django.db import connection, transaction
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIRECTORY = BASE_DIR / "data"
-BATCH_SIZE = 500
+BATCH_SIZE = 5000
+# events parsed and written per batch, and per transaction in incremental mode
+EVENT_BATCH_SIZE = 500
+# batches in flight per parse worker before the writer has to catch up
+QUEUE_DEPTH = 2
 
 sys.path.append(BASE_DIR.as_posix())
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "supernovae.settings")
@@ -15,108 +25,591 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "supernovae.settings")
 django.setup()
 connection.ensure_connection()
 
-# Data migration logic
-# Cleanup everything
 from galaxies.models import Galaxy
 from subtypes.models import SubType
 from sources.models import Source
-from events.models import Event, Attribute, ClaimedType, HostGalaxy
+from events.models import (
+    Event,
+    Attribute,
+    AttributeSpread,
+    ClaimedType,
+    EventDocument,
+    GalaxyStatistics,
+    HostGalaxy,
+    SubTypeStatistics,
+)
+from events import documents
+from events.jsonstream import iter_json_items
+from events.signals import suspended
+from events.summaries import rebuild_all_statistics
+from events.units import normalize_or_none
 
-Attribute.objects.all().delete()
-ClaimedType.objects.all().delete()
-HostGalaxy.objects.all().delete()
-Event.objects.all().delete()
+TABLES = [
+    "galaxies",
+    "subtypes",
+    "sources",
+    "events",
+    "attributes",
+    "host galaxies",
+    "claimed types",
+]
+ATTRIBUTE_FIELDS = ["event", "name", "source", "value", "unit", "normalized_value"]
+HOST_GALAXY_FIELDS = ["event", "galaxy", "source"]
+CLAIMED_TYPE_FIELDS = ["event", "sub_type", "source"]
+SOURCE_FIELDS = ["bibcode", "doi", "secondary"]
+# the only keys of an event object the importer reads
+EVENT_KEYS = ["name", "sources", "attributes", "hostgalaxy", "subtype"]
 
-Galaxy.objects.all().delete()
-SubType.objects.all().delete()
-Source.objects.all().delete()
 
+def load(name, directory=DATA_DIRECTORY):
+    """
+    Stream the rows of a data file, one parsed object at a time. The JSON lines
+    written by extract_data.py are preferred over a JSON array file.
+    """
+    path = Path(directory) / f"{name}.jsonl"
+    if path.exists():
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path.with_suffix(".json"), "r") as f:
+            yield from iter_json_items(f)
 
-# Load all galaxies
-with open(DATA_DIRECTORY / "galaxies.json", "r") as f:
-    data = json.load(f)
 
-galaxies = [Galaxy(name=row["name"]) for row in data]
+def event_batches(rows):
+    """Batches of event rows, each trimmed to the keys the importer reads as it is parsed"""
+    trimmed = ({key: row[key] for key in EVENT_KEYS} for row in rows)
+    for batch in batched(trimmed, EVENT_BATCH_SIZE):
+        yield list(batch)
 
-Galaxy.objects.bulk_create(galaxies, batch_size=BATCH_SIZE)
 
-# Load all subtypes
-with open(DATA_DIRECTORY / "subtypes.json", "r") as f:
-    data = json.load(f)
+def chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
 
-subtypes = [SubType(name=row["name"]) for row in data]
 
-SubType.objects.bulk_create(subtypes, batch_size=BATCH_SIZE)
+def insert_rows(model, fields, rows):
+    """
+    INSERT plain tuples in one executemany per batch. Building a model instance
+    per row costs more than the insert itself at this volume.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(f).column) for f in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+    with connection.cursor() as cursor:
+        for batch in chunks(rows, BATCH_SIZE):
+            cursor.executemany(sql, batch)
+    return len(rows)
 
-# Load all Sources
-with open(DATA_DIRECTORY / "sources.json", "r") as f:
-    data = json.load(f)
 
-sources = [
-    Source(
-        name=row["name"],
-        url=row.get("url"),
-        bibcode=row.get("bibcode"),
-        doi=row.get("doi"),
-        secondary=row.get("secondary", False),
-    )
-    for row in data
-]
+def rows_stored(counts):
+    """Rows inserted or updated"""
+    return sum(count["added"] + count["changed"] for count in counts.values())
 
-Source.objects.bulk_create(sources, batch_size=BATCH_SIZE)
 
-# Import all supernova events
-# Read the data
-with open(DATA_DIRECTORY / "supernova.json", "r") as f:
-    data = json.load(f)
+def rows_removed(counts):
+    return sum(count["removed"] for count in counts.values())
 
-for row in data:
-    # create source alias -> id map
-    source_alias = {
-        s["alias"]: Source.objects.get(name=s["name"], url=s["url"])
-        for s in row["sources"]
-    }
 
-    # create event
-    event = Event.objects.create(name=row["name"])
+def rows_written(counts):
+    return rows_stored(counts) + rows_removed(counts)
+
+
+def lookup_maps():
+    galaxies = dict(Galaxy.objects.values_list("name", "id"))
+    subtypes = dict(SubType.objects.values_list("name", "id"))
+    sources = {(name, url): pk for pk, name, url in Source.objects.values_list("id", "name", "url")}
+    return galaxies, subtypes, sources
+
+
+# ================= Parse pipeline =================
+class StageTimer:
+    """Seconds spent and items handled by each stage of the import"""
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.items = Counter()
+
+    def add(self, stage, seconds, items=0):
+        self.seconds[stage] += seconds
+        self.items[stage] += items
+
+    @contextmanager
+    def stage(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - started
+
+    def timed(self, stage, batches):
+        """Pass the batches on, timing how long each takes to produce"""
+        batches = iter(batches)
+        while True:
+            with self.stage(stage):
+                batch = next(batches, None)
+            if batch is None:
+                return
+            self.items[stage] += len(batch)
+            yield batch
 
-    # create attributes for each source
-    attributes = []
+    def report(self, workers):
+        def rate(stage, seconds):
+            return f"{self.items[stage] / seconds:.0f}/s" if seconds else "-"
+
+        parse_wall = self.seconds["parse"] / workers
+        return [
+            f"read: {self.items['read']} events in {self.seconds['read']:.2f}s "
+            f"({rate('read', self.seconds['read'])})",
+            f"parse: {self.items['parse']} events in {self.seconds['parse']:.2f}s of worker time "
+            f"across {workers} workers ({rate('parse', parse_wall)})",
+            f"write: {self.items['write']} rows inserted or updated in {self.seconds['write']:.2f}s "
+            f"({rate('write', self.seconds['write'])}), "
+            f"{self.seconds['wait']:.2f}s waiting for parsed batches",
+        ]
+
+
+def read_events(name="supernova", directory=DATA_DIRECTORY):
+    """
+    Batches of raw events for the parse workers. JSON lines are passed on as text
+    and parsed by the workers, a JSON array can only be split by parsing it here.
+    """
+    path = Path(directory) / f"{name}.jsonl"
+    if path.exists():
+        with open(path, "r") as f:
+            for batch in batched((line for line in f if line.strip()), EVENT_BATCH_SIZE):
+                yield list(batch)
+    else:
+        with open(path.with_suffix(".json"), "r") as f:
+            yield from event_batches(iter_json_items(f))
+
+
+def resolve_event(row, galaxies, subtypes, sources):
+    """
+    (name, attribute, host galaxy and claimed type rows) of one event, with its
+    source aliases resolved to ids. The rows leave out the event id, which only
+    the writer knows.
+    """
+    # source alias -> source id within this event
+    source_alias = {s["alias"]: sources[(s["name"], s["url"])] for s in row["sources"]}
+
+    attributes, host_galaxies, claimed_types = [], [], []
     for attr in row["attributes"]:
+        unit = attr["unit"] or ""
+        # None for a unit without a conversion, the row is kept and counted
+        normalized = normalize_or_none(attr["name"], attr["value"], unit)
         for s in attr["source"].split(","):
-            attributes.append(
-                Attribute(
-                    name=attr["name"],
-                    value=attr["value"],
-                    unit=attr["unit"] or "",
-                    source=source_alias[s],
-                    event=event,
-                )
-            )
-    Attribute.objects.bulk_create(attributes, batch_size=BATCH_SIZE)
-
-    # create hostgalaxy
-    host_galaxy = []
+            attributes.append((attr["name"], source_alias[s], attr["value"], unit, normalized))
     for g in row["hostgalaxy"]:
         for s in g["source"].split(","):
-            host_galaxy.append(
-                HostGalaxy(
-                    galaxy=Galaxy.objects.get(name=g["name"]),
-                    source=source_alias[s],
-                    event=event,
-                )
-            )
-    HostGalaxy.objects.bulk_create(host_galaxy)
-
-    # create type classification(claimedType)
-    claimed_type = []
+            host_galaxies.append((galaxies[g["name"]], source_alias[s]))
     for c in row["subtype"]:
         for s in c["source"].split(","):
-            claimed_type.append(
-                ClaimedType(
-                    sub_type=SubType.objects.get(name=c["name"]),
-                    source=source_alias[s],
-                    event=event,
-                )
+            claimed_types.append((subtypes[c["name"]], source_alias[s]))
+    return row["name"], attributes, host_galaxies, claimed_types
+
+
+# lookup maps of a parse worker, set once when the worker starts
+_lookups = None
+
+
+def _init_worker(*lookups):
+    global _lookups
+    _lookups = lookups
+
+
+def resolve_batch(batch):
+    """Parse and resolve one batch of raw events, returns (resolved events, seconds spent)"""
+    started = time.perf_counter()
+    resolved = [
+        resolve_event(json.loads(row) if isinstance(row, str) else row, *_lookups)
+        for row in batch
+    ]
+    return resolved, time.perf_counter() - started
+
+
+def resolved_batches(batches, lookups, timer, workers=1):
+    """
+    Resolved batches in input order. With several workers they are resolved in a
+    process pool while the caller writes the previous ones. At most QUEUE_DEPTH
+    batches per worker are in flight, so a slow writer holds reading back instead
+    of results piling up.
+    """
+    batches = timer.timed("read", batches)
+    if workers == 1:
+        _init_worker(*lookups)
+        for batch in batches:
+            resolved, seconds = resolve_batch(batch)
+            timer.add("parse", seconds, len(resolved))
+            yield resolved
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=lookups) as pool:
+        pending = deque()
+
+        def next_resolved():
+            with timer.stage("wait"):
+                resolved, seconds = pending.popleft().result()
+            timer.add("parse", seconds, len(resolved))
+            return resolved
+
+        for batch in batches:
+            pending.append(pool.submit(resolve_batch, batch))
+            if len(pending) >= workers * QUEUE_DEPTH:
+                yield next_resolved()
+        while pending:
+            yield next_resolved()
+
+
+def claim_rows(resolved, event_ids):
+    """Attribute, host galaxy and claimed type rows of resolved events, as tuples"""
+    attributes, host_galaxies, claimed_types = [], [], []
+    for name, event_attributes, event_hosts, event_claims in resolved:
+        event_id = event_ids[name]
+        attributes.extend((event_id, *row) for row in event_attributes)
+        host_galaxies.extend((event_id, *row) for row in event_hosts)
+        claimed_types.extend((event_id, *row) for row in event_claims)
+    return attributes, host_galaxies, claimed_types
+
+
+def count_unknown_units(attributes, counts):
+    counts["unknown unit"] += sum(1 for row in attributes if row[5] is None)
+
+
+# ================= Full reload =================
+def clear_catalog(counts):
+    """
+    Empty the catalog and every table derived from it with plain DELETEs, children
+    first. The ORM's delete() would load each row to cascade and signal it.
+    """
+    tables = [
+        (EventDocument, None),
+        (AttributeSpread, None),
+        (GalaxyStatistics, None),
+        (SubTypeStatistics, None),
+        (Attribute, "attributes"),
+        (ClaimedType, "claimed types"),
+        (HostGalaxy, "host galaxies"),
+        (Event, "events"),
+        (Galaxy, "galaxies"),
+        (SubType, "subtypes"),
+        (Source, "sources"),
+    ]
+    with connection.cursor() as cursor:
+        for model, table in tables:
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+            if table:
+                counts[table]["removed"] += cursor.rowcount
+
+
+def import_all(batches, counts, directory=DATA_DIRECTORY, workers=1, timer=None):
+    """
+    Replace the whole catalog with the contents of the data files. Events are
+    written batch by batch as they are parsed, so memory does not grow with the
+    size of the file.
+    """
+    timer = timer or StageTimer()
+    clear_catalog(counts)
+
+    Galaxy.objects.bulk_create(
+        (Galaxy(name=row["name"]) for row in load("galaxies", directory)),
+        batch_size=BATCH_SIZE,
+    )
+    SubType.objects.bulk_create(
+        (SubType(name=row["name"]) for row in load("subtypes", directory)),
+        batch_size=BATCH_SIZE,
+    )
+    Source.objects.bulk_create(
+        (
+            Source(
+                name=row["name"],
+                url=row.get("url"),
+                bibcode=row.get("bibcode"),
+                doi=row.get("doi"),
+                secondary=row.get("secondary", False),
+            )
+            for row in load("sources", directory)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    galaxies, subtypes, sources = lookup_maps()
+    counts["galaxies"]["added"] += len(galaxies)
+    counts["subtypes"]["added"] += len(subtypes)
+    counts["sources"]["added"] += len(sources)
+
+    lookups = (galaxies, subtypes, sources)
+    for resolved in resolved_batches(batches, lookups, timer, workers):
+        stored = rows_stored(counts)
+        with timer.stage("write"):
+            created = Event.objects.bulk_create([Event(name=name) for name, *_ in resolved])
+            events = {event.name: event.pk for event in created}
+            attributes, host_galaxies, claimed_types = claim_rows(resolved, events)
+            count_unknown_units(attributes, counts["attributes"])
+            insert_rows(Attribute, ATTRIBUTE_FIELDS, attributes)
+            insert_rows(HostGalaxy, HOST_GALAXY_FIELDS, host_galaxies)
+            insert_rows(ClaimedType, CLAIMED_TYPE_FIELDS, claimed_types)
+
+        counts["events"]["added"] += len(created)
+        counts["attributes"]["added"] += len(attributes)
+        counts["host galaxies"]["added"] += len(host_galaxies)
+        counts["claimed types"]["added"] += len(claimed_types)
+        # rows inserted or updated, removed rows would inflate the rate
+        timer.items["write"] += rows_stored(counts) - stored
+
+
+# ================= Incremental upsert =================
+def import_changes(batches, counts, directory=DATA_DIRECTORY, workers=1, timer=None):
+    """
+    Diff the data files against the database by event name and natural keys and
+    write only the difference: lookups first, then events in batched transactions
+    as they are parsed, then whatever disappeared from the files.
+    """
+    timer = timer or StageTimer()
+    with transaction.atomic():
+        stale_galaxies = sync_names(Galaxy, load("galaxies", directory), counts["galaxies"])
+        stale_subtypes = sync_names(SubType, load("subtypes", directory), counts["subtypes"])
+        stale_sources = sync_sources(load("sources", directory), counts["sources"])
+    galaxies, subtypes, sources = lookup_maps()
+
+    events = dict(Event.objects.values_list("name", "id"))
+    # names only, the rows themselves are dropped once their batch is written
+    seen = set()
+
+    lookups = (galaxies, subtypes, sources)
+    for resolved in resolved_batches(batches, lookups, timer, workers):
+        names = [name for name, *_ in resolved]
+        seen.update(names)
+        stored = rows_stored(counts)
+        with timer.stage("write"), transaction.atomic():
+            created = Event.objects.bulk_create(
+                [Event(name=name) for name in names if name not in events]
             )
-    ClaimedType.objects.bulk_create(claimed_type)
+            events.update({event.name: event.pk for event in created})
+            counts["events"]["added"] += len(created)
+
+            attributes, host_galaxies, claimed_types = claim_rows(resolved, events)
+            count_unknown_units(attributes, counts["attributes"])
+            event_ids = [events[name] for name in names]
+            touched = sync_attributes(event_ids, attributes, counts["attributes"])
+            touched |= sync_claims(
+                HostGalaxy, HOST_GALAXY_FIELDS, event_ids, host_galaxies, counts["host galaxies"]
+            )
+            touched |= sync_claims(
+                ClaimedType, CLAIMED_TYPE_FIELDS, event_ids, claimed_types, counts["claimed types"]
+            )
+            documents.invalidate_events(touched)
+        # rows inserted or updated, removed rows would inflate the rate
+        timer.items["write"] += rows_stored(counts) - stored
+
+    removed = sorted(events.keys() - seen)
+    with transaction.atomic():
+        for names in chunks(removed, EVENT_BATCH_SIZE):
+            # claims of removed events go with them
+            for model, table in [
+                (Attribute, "attributes"),
+                (HostGalaxy, "host galaxies"),
+                (ClaimedType, "claimed types"),
+            ]:
+                counts[table]["removed"] += model.objects.filter(event__name__in=names).count()
+            Event.objects.filter(name__in=names).delete()
+        counts["events"]["removed"] += len(removed)
+
+        # unreferenced only now that the claims citing them are gone
+        for model, ids, table in [
+            (Galaxy, stale_galaxies, "galaxies"),
+            (SubType, stale_subtypes, "subtypes"),
+            (Source, stale_sources, "sources"),
+        ]:
+            model.objects.filter(pk__in=ids).delete()
+            counts[table]["removed"] += len(ids)
+
+
+def sync_names(model, rows, counts):
+    """Add the named rows missing from the table, returns ids of the ones no longer listed"""
+    existing = dict(model.objects.values_list("name", "id"))
+    names = {row["name"] for row in rows}
+    added = model.objects.bulk_create(
+        [model(name=name) for name in sorted(names - existing.keys())], batch_size=BATCH_SIZE
+    )
+    counts["added"] += len(added)
+    return [pk for name, pk in existing.items() if name not in names]
+
+
+def sync_sources(rows, counts):
+    """Add and update sources by (name, url), returns ids of the ones no longer listed"""
+    existing = {
+        (name, url): (pk, tuple(fields))
+        for pk, name, url, *fields in Source.objects.values_list(
+            "id", "name", "url", *SOURCE_FIELDS
+        )
+    }
+    incoming = {
+        (row["name"], row.get("url")): (row.get("bibcode"), row.get("doi"), row.get("secondary", False))
+        for row in rows
+    }
+
+    added = [
+        Source(name=name, url=url, **dict(zip(SOURCE_FIELDS, fields)))
+        for (name, url), fields in incoming.items()
+        if (name, url) not in existing
+    ]
+    changed = [
+        Source(pk=existing[key][0], **dict(zip(SOURCE_FIELDS, fields)))
+        for key, fields in incoming.items()
+        if key in existing and existing[key][1] != fields
+    ]
+    Source.objects.bulk_create(added, batch_size=BATCH_SIZE)
+    Source.objects.bulk_update(changed, SOURCE_FIELDS, batch_size=BATCH_SIZE)
+    # stored documents embed the source details
+    for source in changed:
+        documents.invalidate_source(source.pk)
+
+    counts["added"] += len(added)
+    counts["changed"] += len(changed)
+    return [pk for key, (pk, _) in existing.items() if key not in incoming]
+
+
+def sync_attributes(event_ids, rows, counts):
+    """
+    Diff attributes by (event, name, source), returns the ids of the events touched.
+    A source may report several values of an attribute, so each key is diffed as a
+    multiset of (value, unit): equal values are kept, the remaining ones are paired
+    up as changes and the rest added or removed.
+    """
+    incoming = defaultdict(list)
+    for row in rows:
+        incoming[row[:3]].append(row)
+    existing = defaultdict(list)
+    for pk, event_id, name, source_id, value, unit in Attribute.objects.filter(
+        event_id__in=event_ids
+    ).order_by("id").values_list("id", "event_id", "name", "source_id", "value", "unit"):
+        existing[(event_id, name, source_id)].append((pk, value, unit))
+
+    added, changed, removed = [], [], []
+    for key in incoming.keys() | existing.keys():
+        unmatched = defaultdict(list)
+        for row in incoming.get(key, []):
+            unmatched[row[3:5]].append(row)
+        stale = []
+        for pk, value, unit in existing.get(key, []):
+            if unmatched.get((value, unit)):
+                unmatched[(value, unit)].pop()
+            else:
+                stale.append(pk)
+        new = [row for group in unmatched.values() for row in group]
+        changed.extend(zip(stale, new))
+        removed.extend((pk, key[0]) for pk in stale[len(new) :])
+        added.extend(new[len(stale) :])
+
+    insert_rows(Attribute, ATTRIBUTE_FIELDS, added)
+    Attribute.objects.filter(pk__in=[pk for pk, _ in removed]).delete()
+    Attribute.objects.bulk_update(
+        [
+            Attribute(pk=pk, value=row[3], unit=row[4], normalized_value=row[5])
+            for pk, row in changed
+        ],
+        ["value", "unit", "normalized_value"],
+        batch_size=BATCH_SIZE,
+    )
+
+    counts["added"] += len(added)
+    counts["changed"] += len(changed)
+    counts["removed"] += len(removed)
+    return (
+        {row[0] for row in added}
+        | {event_id for _, event_id in removed}
+        | {row[0] for _, row in changed}
+    )
+
+
+def sync_claims(model, fields, event_ids, rows, counts):
+    """Diff claims, which are nothing but their natural key, returns the ids of the events touched"""
+    incoming = set(rows)
+    existing = {}
+    removed = []
+    for pk, *key in model.objects.filter(event_id__in=event_ids).values_list("id", *fields):
+        key = tuple(key)
+        if key in existing or key not in incoming:
+            removed.append((pk, key[0]))
+        else:
+            existing[key] = pk
+
+    added = sorted(incoming - existing.keys())
+    insert_rows(model, fields, added)
+    model.objects.filter(pk__in=[pk for pk, _ in removed]).delete()
+
+    counts["added"] += len(added)
+    counts["removed"] += len(removed)
+    return {row[0] for row in added} | {event_id for _, event_id in removed}
+
+
+def run(incremental=False, directory=DATA_DIRECTORY, workers=1, timer=None):
+    """Import the data files in directory, returns the per-table counts"""
+    batches = read_events("supernova", directory)
+    counts = defaultdict(Counter)
+    timer = timer or StageTimer()
+
+    # bulk writes skip the per-row signal maintenance, derived tables are rebuilt at the end
+    with suspended():
+        if incremental:
+            import_changes(batches, counts, directory, workers, timer)
+        else:
+            with transaction.atomic():
+                import_all(batches, counts, directory, workers, timer)
+
+    if rows_written(counts):
+        with timer.stage("statistics"):
+            rebuild_all_statistics()
+    return counts
+
+
+def worker_count(value):
+    """argparse type of --workers, 1 resolves events in the writing process"""
+    workers = int(value)
+    if workers < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {workers}")
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the data files into the catalog")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Write only the difference to the database instead of reloading everything",
+    )
+    parser.add_argument(
+        "--workers",
+        type=worker_count,
+        default=os.cpu_count() or 1,
+        help="Processes parsing events while this one writes, 1 parses in this process (default: one per core)",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    timer = StageTimer()
+    counts = run(args.incremental, workers=args.workers, timer=timer)
+    stored, removed = rows_stored(counts), rows_removed(counts)
+    imported = time.perf_counter() - timer.seconds["statistics"]
+
+    for table in TABLES:
+        count = counts[table]
+        print(f"{table}: {count['added']} added, {count['changed']} changed, {count['removed']} removed")
+    if counts["attributes"]["unknown unit"]:
+        print(
+            f"Warning: {counts['attributes']['unknown unit']} attributes have a unit without "
+            "a conversion, stored without a normalized value"
+        )
+    print(
+        f"Inserted or updated {stored} rows ({stored / (imported - started):.0f} rows/s) "
+        f"and removed {removed} rows in {imported - started:.2f}s, "
+        f"statistics rebuilt in {timer.seconds['statistics']:.2f}s"
+    )
+    for line in timer.report(args.workers):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
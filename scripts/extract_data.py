@@ -1,16 +1,31 @@
+import argparse
+import hashlib
 import json
 import os
+import pickle
+import sqlite3
+from multiprocessing import Pool
 
 # ================= CONFIG =================
 
 DATA_DIR = "./sne-2020-2024"
 
-OUTPUT_SUPERNOVAE = "data/supernova.json"
-OUTPUT_SOURCES = "data/sources.json"
-OUTPUT_HOSTS = "data/galaxies.json"
-OUTPUT_SUBTYPES = "data/subtypes.json"
+# compact JSON lines, written as files are merged
+OUTPUT_SUPERNOVAE = "data/supernova.jsonl"
+OUTPUT_SOURCES = "data/sources.jsonl"
+OUTPUT_HOSTS = "data/galaxies.jsonl"
+OUTPUT_SUBTYPES = "data/subtypes.jsonl"
 
-MAX_TOTAL_RECORDS = 10_000
+# size, mtime and hash of every file parsed, with what was extracted from it
+MANIFEST_PATH = "data/extract_manifest.sqlite3"
+# bump whenever extract_supernova() changes, so recorded extractions are discarded
+MANIFEST_VERSION = 1
+
+# stop before the records counted (including uniques) would exceed this, None for the whole dump
+MAX_TOTAL_RECORDS = None
+
+# files handed to a worker at a time, large enough to amortize the IPC
+CHUNK_SIZE = 64
 
 ATTRIBUTE_KEYS = [
     "lumdist",
@@ -20,28 +35,9 @@ ATTRIBUTE_KEYS = [
     "maxappmag",
 ]
 
-# ================= GLOBAL STATE =================
-
-total_count = 0
-
-seen_sources = {}
-seen_hosts = {}
-seen_subtypes = {}
-
-supernova_results = []
-
 # ================= HELPERS =================
 
 
-def bump(n: int):
-    global total_count
-    total_count += n
-    if total_count > MAX_TOTAL_RECORDS:
-        raise RuntimeError(
-            f"GLOBAL LIMIT EXCEEDED: {total_count} > {MAX_TOTAL_RECORDS}"
-        )
-
-
 def safe_float(v):
     try:
         return float(v)
@@ -53,135 +49,356 @@ def source_key(s):
     return s.get("bibcode") or s.get("doi") or s.get("url")
 
 
-# ================= MAIN =================
-try:
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"):
-            continue
-
-        path = os.path.join(DATA_DIR, filename)
+# ================= PARSING (worker processes) =================
+def extract_file(path, known_hash=None):
+    """
+    Hash one per-supernova OSC file and parse it into everything the merge needs,
+    returns (sha256, extracted). Files whose content still hashes to known_hash
+    are not parsed and come back with None. Pure, so files can be parsed in any
+    process and in any order.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if digest == known_hash:
+        return digest, None
+    return digest, extract_supernova(json.loads(content))
 
-        with open(path, "r") as f:
-            data = json.load(f)
 
-        # one supernova per file
-        sn_name, sn = next(iter(data.items()))
+def _extract_task(task):
+    return extract_file(*task)
 
-        # ---------- COUNT ----------
 
-        # supernova itself
-        bump(1)
+def extract_supernova(data):
+    # one supernova per file
+    sn_name, sn = next(iter(data.items()))
 
-        # ---------- SOURCES ----------
-        sources = sn.get("sources", [])
-        bump(len(sources))
+    sources = sn.get("sources", [])
+    subtypes = sn.get("claimedtype", [])
+    hosts = sn.get("host", [])
 
-        for s in sources:
-            key = source_key(s)
-            if key and key not in seen_sources:
-                seen_sources[key] = {
+    return {
+        "sources": [
+            (
+                source_key(s),
+                {
                     "name": s.get("name"),
                     "doi": s.get("doi"),
                     "bibcode": s.get("bibcode"),
                     "url": s.get("url"),
                     "secondary": s.get("secondary", False),
+                },
+            )
+            for s in sources
+        ],
+        "subtypes": [
+            (t.get("value"), {"name": t.get("value"), "source": t.get("source")})
+            for t in subtypes
+        ],
+        "hosts": [
+            (h.get("value"), {"name": h.get("value"), "source": h.get("source")})
+            for h in hosts
+        ],
+        "attribute_count": sum(1 for k in ATTRIBUTE_KEYS if k in sn and sn[k]),
+        "supernova": {
+            "name": sn_name,
+            "sources": [
+                {
+                    "name": s.get("name"),
+                    "doi": s.get("doi"),
+                    "secondary": s.get("secondary", False),
+                    "url": s.get("url"),
+                    "bibcode": s.get("bibcode"),
+                    "alias": s.get("alias"),
                 }
-                bump(1)  # unique source
-
-        # ---------- SUBTYPES ----------
-        subtypes = sn.get("claimedtype", [])
-        bump(len(subtypes))
-
-        for t in subtypes:
-            key = t.get("value")
-            if key and key not in seen_subtypes:
-                seen_subtypes[key] = {
+                for s in sources
+            ],
+            "hostgalaxy": [
+                {
+                    "name": h.get("value"),
+                    "source": h.get("source"),
+                }
+                for h in hosts
+            ],
+            "subtype": [
+                {
                     "name": t.get("value"),
                     "source": t.get("source"),
                 }
-                bump(1)  # unique subtype
-
-        # ---------- HOST GALAXIES ----------
-        hosts = sn.get("host", [])
-        bump(len(hosts))
-
-        for h in hosts:
-            key = h.get("value")
-            if key and key not in seen_hosts:
-                seen_hosts[key] = {
-                    "name": h.get("value"),
-                    "source": h.get("source"),
+                for t in subtypes
+            ],
+            "attributes": [
+                {
+                    "name": k,
+                    "value": safe_float(sn[k][0].get("value")),
+                    "unit": sn[k][0].get("u_value"),
+                    "source": sn[k][0].get("source"),
                 }
-                bump(1)  # unique host galaxy
-
-        # ---------- ATTRIBUTES ----------
-        attribute_count = sum(1 for k in ATTRIBUTE_KEYS if k in sn and sn[k])
-        bump(attribute_count)
-
-        # ---------- BUILD SUPERNOVA OUTPUT ----------
-
-        supernova_results.append(
-            {
-                "name": sn_name,
-                "sources": [
-                    {
-                        "name": s.get("name"),
-                        "doi": s.get("doi"),
-                        "secondary": s.get("secondary", False),
-                        "url": s.get("url"),
-                        "bibcode": s.get("bibcode"),
-                        "alias": s.get("alias"),
-                    }
-                    for s in sources
-                ],
-                "hostgalaxy": [
-                    {
-                        "name": h.get("value"),
-                        "source": h.get("source"),
-                    }
-                    for h in hosts
-                ],
-                "subtype": [
-                    {
-                        "name": t.get("value"),
-                        "source": t.get("source"),
-                    }
-                    for t in subtypes
-                ],
-                "attributes": [
-                    {
-                        "name": k,
-                        "value": safe_float(sn[k][0].get("value")),
-                        "unit": sn[k][0].get("u_value"),
-                        "source": sn[k][0].get("source"),
-                    }
-                    for k in ATTRIBUTE_KEYS
-                    if k in sn
-                    and sn[k]
-                    and safe_float(sn[k][0].get("value")) is not None
-                ],
-            }
+                for k in ATTRIBUTE_KEYS
+                if k in sn and sn[k] and safe_float(sn[k][0].get("value")) is not None
+            ],
+        },
+    }
+
+
+# ================= MERGING (main process) =================
+class JSONLinesWriter:
+    """
+    Rows written as compact JSON lines to a temporary file as they arrive, and
+    renamed over the output once the run completes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(f"{path}.tmp", "w")
+
+    def write(self, row):
+        self.file.write(json.dumps(row, separators=(",", ":")))
+        self.file.write("\n")
+
+    def publish(self):
+        self.file.close()
+        os.replace(self.file.name, self.path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.file.name)
+
+
+class Extraction:
+    """
+    Deduplicates the files merged so far into the outputs. Files are merged in
+    listing order whatever process parsed them, with the first occurrence of a
+    source, subtype or host kept, so the output matches a serial run exactly.
+    Only the keys of unique records are kept in memory, every row goes straight
+    to its output.
+
+    With max_records, files are merged whole until the next one would take the
+    records counted past it, which samples the head of the dump.
+    """
+
+    def __init__(self, outputs, max_records=MAX_TOTAL_RECORDS):
+        self.outputs = outputs
+        self.max_records = max_records
+        self.total_count = 0
+        self.supernova_count = 0
+        self.seen = {"sources": set(), "subtypes": set(), "hosts": set()}
+
+    def merge(self, extracted):
+        """Write the file's records, returns False when it does not fit under max_records"""
+        unique = {kind: self._unique(seen, extracted[kind]) for kind, seen in self.seen.items()}
+        # the supernova, every claim, every attribute and each new unique record
+        records = (
+            1
+            + sum(len(extracted[kind]) + len(rows) for kind, rows in unique.items())
+            + extracted["attribute_count"]
+        )
+        if self.max_records is not None and self.total_count + records > self.max_records:
+            return False
+
+        self.total_count += records
+        for kind, rows in unique.items():
+            self.seen[kind].update(rows)
+            for row in rows.values():
+                self.outputs[kind].write(row)
+        self.outputs["supernovae"].write(extracted["supernova"])
+        self.supernova_count += 1
+        return True
+
+    @staticmethod
+    def _unique(seen, rows):
+        unique = {}
+        for key, row in rows:
+            if key and key not in seen and key not in unique:
+                unique[key] = row
+        return unique
+
+
+def open_outputs():
+    return {
+        "supernovae": JSONLinesWriter(OUTPUT_SUPERNOVAE),
+        "sources": JSONLinesWriter(OUTPUT_SOURCES),
+        "hosts": JSONLinesWriter(OUTPUT_HOSTS),
+        "subtypes": JSONLinesWriter(OUTPUT_SUBTYPES),
+    }
+
+
+# ================= MANIFEST =================
+class Manifest:
+    """
+    Files seen by earlier runs, keyed by path: size, mtime, content hash and the
+    pickled extraction. Kept in SQLite so a run reads extractions one at a time
+    instead of loading the whole dump's worth of records.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.connection = sqlite3.connect(path)
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != MANIFEST_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS files")
+            self.connection.execute(f"PRAGMA user_version = {MANIFEST_VERSION}")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                extracted BLOB NOT NULL
+            )
+            """
         )
 
-# ================= WRITE OUTPUT FILES =================
-finally:
-    with open(OUTPUT_SUPERNOVAE, "w") as f:
-        json.dump(supernova_results, f, indent=2)
-
-    with open(OUTPUT_SOURCES, "w") as f:
-        json.dump(list(seen_sources.values()), f, indent=2)
+    def index(self):
+        """{path: (size, mtime_ns, sha256)} of every recorded file"""
+        rows = self.connection.execute("SELECT path, size, mtime_ns, sha256 FROM files")
+        return {path: tuple(known) for path, *known in rows}
+
+    def extracted(self, path):
+        (extracted,) = self.connection.execute(
+            "SELECT extracted FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return pickle.loads(extracted)
+
+    def store(self, path, stat, digest, extracted):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest, pickle.dumps(extracted)),
+        )
 
-    with open(OUTPUT_HOSTS, "w") as f:
-        json.dump(list(seen_hosts.values()), f, indent=2)
+    def touch(self, path, stat):
+        """Record the new size and mtime of a file whose content did not change"""
+        self.connection.execute(
+            "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+            (stat.st_size, stat.st_mtime_ns, path),
+        )
 
-    with open(OUTPUT_SUBTYPES, "w") as f:
-        json.dump(list(seen_subtypes.values()), f, indent=2)
+    def prune(self, paths):
+        """Forget the files that are no longer in the dump"""
+        self.connection.execute("CREATE TEMP TABLE listed (path TEXT PRIMARY KEY)")
+        self.connection.executemany("INSERT INTO listed VALUES (?)", ((path,) for path in paths))
+        self.connection.execute("DELETE FROM files WHERE path NOT IN (SELECT path FROM listed)")
+        self.connection.execute("DROP TABLE listed")
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def list_files(directory=DATA_DIR):
+    # sorted, so the output does not depend on the directory's listing order
+    return [
+        os.path.join(directory, filename)
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(".json")
+    ]
+
+
+def extract_all(paths, extraction, workers=None, manifest=None):
+    """
+    Parse the files across a pool of worker processes and merge them into the
+    extraction in the order given. One worker parses in this process.
+
+    With a manifest, files whose size and mtime are unchanged are merged from
+    their recorded extraction without being read, and files whose content still
+    hashes the same are not parsed. Returns the number of files parsed, which
+    stops with the first file the extraction has no room for.
+    """
+    index = manifest.index() if manifest else {}
+    recorded = {}
+    changed = []
+    for path in paths:
+        stat = os.stat(path)
+        known = index.get(path)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            recorded[path] = None
+        else:
+            changed.append((path, known[2] if known else None))
+            recorded[path] = stat
+
+    if workers == 1 or not changed:
+        results = map(_extract_task, changed)
+        pool = None
+    else:
+        pool = Pool(workers)
+        # imap yields in submission order, while workers run ahead
+        results = pool.imap(_extract_task, changed, chunksize=CHUNK_SIZE)
+
+    parsed = 0
+    try:
+        for path in paths:
+            stat = recorded[path]
+            if stat is None:
+                extracted = manifest.extracted(path)
+            else:
+                digest, extracted = next(results)
+                if extracted is None:
+                    manifest.touch(path, stat)
+                    extracted = manifest.extracted(path)
+                else:
+                    parsed += 1
+                    if manifest:
+                        manifest.store(path, stat, digest, extracted)
+            if not extraction.merge(extracted):
+                break
+    finally:
+        if pool:
+            pool.terminate()
+        if manifest:
+            manifest.prune(paths)
+    return parsed
 
-# ================= SUMMARY =================
 
-print("DONE")
-print(f"Total records counted (including uniques): {total_count}")
-print(f"Supernovae: {len(supernova_results)}")
-print(f"Unique sources: {len(seen_sources)}")
-print(f"Unique host galaxies: {len(seen_hosts)}")
-print(f"Unique subtypes: {len(seen_subtypes)}")
+# ================= MAIN =================
+def main():
+    parser = argparse.ArgumentParser(description="Extract the catalog data files from the OSC dump")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes parsing files in parallel (default: one per core)",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Parse every file again instead of reusing the manifest",
+    )
+    parser.add_argument(
+        "--max-records",
+        type=int,
+        default=MAX_TOTAL_RECORDS,
+        help="Extract only the first files, up to this many records including uniques",
+    )
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+    manifest = Manifest()
+    paths = list_files()
+    outputs = open_outputs()
+    extraction = Extraction(outputs, args.max_records)
+    try:
+        parsed = extract_all(paths, extraction, args.workers, manifest)
+    except BaseException:
+        for output in outputs.values():
+            output.discard()
+        raise
+    finally:
+        manifest.close()
+
+    # ================= WRITE OUTPUT FILES =================
+    for output in outputs.values():
+        output.publish()
+
+    # ================= SUMMARY =================
+    print("DONE")
+    print(f"Files merged: {extraction.supernova_count} ({parsed} parsed, the rest from the manifest)")
+    print(f"Total records counted (including uniques): {extraction.total_count}")
+    print(f"Supernovae: {extraction.supernova_count}")
+    print(f"Unique sources: {len(extraction.seen['sources'])}")
+    print(f"Unique host galaxies: {len(extraction.seen['hosts'])}")
+    print(f"Unique subtypes: {len(extraction.seen['subtypes'])}")
+
+
+if __name__ == "__main__":
+    main()
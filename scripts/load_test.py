@@ -0,0 +1,72 @@
+"""
+Concurrent load generator for the read API.
+
+Fires GET requests at a running server from a pool of threads and reports
+throughput and latency percentiles, e.g. to compare the WSGI and ASGI deployments:
+
+    uv run scripts/load_test.py http://127.0.0.1:8000/api/events/supernova-uncertainty
+    uv run scripts/load_test.py http://127.0.0.1:8000/api/async/events/supernova-uncertainty
+"""
+
+import argparse
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, TimeoutError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run(urls, requests, concurrency, timeout):
+    targets = [urls[i % len(urls)] for i in range(requests)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda url: fetch(url, timeout), targets))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, ok in results if not ok)
+    return {
+        "requests": requests,
+        "failures": failures,
+        "throughput": requests / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("urls", nargs="+", help="URLs requested round-robin")
+    parser.add_argument("-n", "--requests", type=int, default=1000)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    report = run(args.urls, args.requests, args.concurrency, args.timeout)
+    print(
+        f"{report['requests']} requests, {report['failures']} failed, "
+        f"{report['throughput']:.1f} req/s, mean {report['mean_ms']:.1f} ms, "
+        f"p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
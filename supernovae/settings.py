@@ -105,6 +105,12 @@ DATABASES = {
     }
 }
 
+# Columnar snapshot of the claim and attribute tables for analytics, rebuilt
+# by a read after writes at most once per interval (seconds), see events.snapshot.
+# None leaves rebuilds to a periodic `manage.py write_catalog_snapshot`
+CATALOG_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+CATALOG_SNAPSHOT_REBUILD_INTERVAL = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -53,6 +53,7 @@ urlpatterns = [
                 path("galaxies/", include("galaxies.urls"), name="galaxy"),
                 path("subtypes/", include("subtypes.urls"), name="subtype"),
                 path("events/", include("events.urls"), name="event"),
+                path("async/events/", include("events.async_urls"), name="event_async"),
             ]
         ),
     ),